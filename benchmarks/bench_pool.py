@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+"""
+allocations per request, with TreeForm(params) and with TreeForm.checkout(params)
+
+    $ python benchmarks/bench_pool.py --requests 2000
+
+each request builds (or checks out) a form of a few nodes and a short sequence, validates it
+and reads cleaned_data. reports the time per request and the gen0 collections of the whole run
+(a collection is triggered by every 700 net allocations of container objects).
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+here = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+import django  # NOQA
+from django.conf import settings  # NOQA
+if not settings.configured:
+    settings.configure()
+    django.setup()
+
+from django import forms  # NOQA
+from django_treeform import TreeForm, Node, SequenceNode  # NOQA
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class AddressForm(forms.Form):
+    street = forms.CharField(max_length=100)
+    city = forms.CharField(max_length=100)
+    zipcode = forms.RegexField(r"^\d{3}-\d{4}$")
+
+
+class OrderForm(TreeForm):
+    name = forms.CharField()
+    address = Node(AddressForm)
+    center = Node(PointForm)
+    points = SequenceNode(PointForm)
+
+
+def make_params(i, n_points):
+    return {
+        "name": "order{}".format(i),
+        "address": {"street": "x", "city": "y", "zipcode": "123-4567" if i % 10 else "?"},
+        "center": {"x": str(i), "y": "0"},
+        "points": [{"x": str(j), "y": str(i)} for j in range(n_points)],
+    }
+
+
+def fresh(params):
+    form = OrderForm(params)
+    form.is_valid()
+    return form.cleaned_data
+
+
+def pooled(params):
+    with OrderForm.checkout(params) as form:
+        form.is_valid()
+        return form.cleaned_data
+
+
+def run(handle, list_of_params):
+    gc.collect()
+    collections = gc.get_stats()[0]["collections"]
+    t = time.perf_counter()
+    for params in list_of_params:
+        handle(params)
+    elapsed = time.perf_counter() - t
+    return elapsed, gc.get_stats()[0]["collections"] - collections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    list_of_params = [make_params(i, args.points) for i in range(args.requests)]
+    pooled(list_of_params[0])  # warm up the pool
+    print("{:<8} {:>12} {:>10}".format("mode", "us/request", "gen0 gcs"))
+    for name, handle in [("fresh", fresh), ("pooled", pooled)]:
+        elapsed, collections = run(handle, list_of_params)
+        print("{:<8} {:>12.1f} {:>10}".format(name, elapsed / args.requests * 1e6, collections))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# -*- coding:utf-8 -*-
+"""
+benchmarks of django_treeform (tree depth, sequence width, field count, error density)
+
+    $ python benchmarks/bench_treeform.py --output before.json
+    $ git checkout <other commit>
+    $ python benchmarks/bench_treeform.py --output after.json --compare before.json
+
+each case measures construction, is_valid(), errors and cleaned_data materialization
+(best of --repeat runs, in seconds), the peak traced memory of one whole run (KiB)
+and the memory retained by the validated form before errors/cleaned_data are built (KiB).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+here = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+import django  # NOQA
+from django.conf import settings  # NOQA
+if not settings.configured:
+    settings.configure()
+    django.setup()
+
+from django import forms  # NOQA
+from django_treeform import TreeForm, Node, Sequence, SequenceNode  # NOQA
+
+
+def make_form(n_fields):
+    attrs = {"f{}".format(i): forms.IntegerField() for i in range(n_fields)}
+    return type("Form{}".format(n_fields), (forms.Form, ), attrs)
+
+
+def make_item(i, n_fields, invalid):
+    item = {"f{}".format(j): str(i + j) for j in range(n_fields)}
+    if invalid:
+        item["f0"] = "x{}".format(i)
+    return item
+
+
+def make_items(n, n_fields, invalid_ratio):
+    # invalid items are spread evenly, not clustered at the head or tail
+    n_invalid = int(n * invalid_ratio)
+    step = (n / float(n_invalid)) if n_invalid else None
+    invalid = set(int(k * step) for k in range(n_invalid)) if step else set()
+    return [make_item(i, n_fields, i in invalid) for i in range(n)]
+
+
+def make_nested(depth, n_fields):
+    """TreeFormTests4 like chain: {"a": {"a": ... {"items": [...]}}}"""
+    cls = type("Leaf", (TreeForm, ), {"items": SequenceNode(make_form(n_fields))})
+    for i in range(depth):
+        cls = type("Depth{}".format(i), (TreeForm, ), {"a": cls})
+    return cls
+
+
+def wrap_nested(depth, items):
+    params = {"items": items}
+    for _ in range(depth):
+        params = {"a": params}
+    return params
+
+
+def make_record_form(n_nodes):
+    """TreeForm with scalar fields and `n_nodes` Node children, many small nodes per item"""
+    attrs = {"id": forms.IntegerField(), "name": forms.CharField()}
+    for i in range(n_nodes):
+        attrs["n{}".format(i)] = Node(make_form(2))
+    return type("Record{}".format(n_nodes), (TreeForm, ), attrs)
+
+
+def nodes_case(n, n_nodes=3):
+    formclass = Sequence(make_record_form(n_nodes))
+    item = {"id": "1", "name": "foo"}
+    item.update({"n{}".format(i): {"f0": "1", "f1": "2"} for i in range(n_nodes)})
+    params = [dict(item) for _ in range(n)]
+    return "nodes n={} nodes/item={}".format(n, n_nodes), formclass, params
+
+
+def sequence_case(n, n_fields=2, invalid_ratio=0.0, fast=False, columnar=False):
+    formclass = Sequence(make_form(n_fields), fast=fast, columnar=columnar)
+    params = make_items(n, n_fields, invalid_ratio)
+    name = "sequence n={} fields={} invalid={} fast={}".format(n, n_fields, invalid_ratio, fast)
+    if columnar:
+        name += " columnar"
+    return name, formclass, params
+
+
+def depth_case(depth, n=10, n_fields=2):
+    formclass = make_nested(depth, n_fields)
+    params = wrap_nested(depth, make_items(n, n_fields, 0.0))
+    return "depth={} n={} fields={}".format(depth, n, n_fields), formclass, params
+
+
+def cases(quick=False):
+    lengths = [10, 1000, 10000] if quick else [10, 1000, 10000, 100000]
+    for n in lengths:
+        for fast in (False, True):
+            yield sequence_case(n, fast=fast)
+        yield sequence_case(n, fast=True, columnar=True)
+    for n_fields in [1, 10, 50]:
+        yield sequence_case(1000, n_fields=n_fields)
+    for ratio in [0.0, 0.1, 0.5, 1.0]:
+        yield sequence_case(10000 if not quick else 1000, invalid_ratio=ratio)
+        yield sequence_case(10000 if not quick else 1000, invalid_ratio=ratio, fast=True, columnar=True)
+    for depth in [1, 5, 20]:
+        yield depth_case(depth, n=10)
+        yield depth_case(depth, n=1000)
+    for n in [1000, 10000] if quick else [1000, 10000, 50000]:
+        yield nodes_case(n)
+
+
+def run_once(formclass, params):
+    timings = {}
+    t = time.perf_counter()
+    form = formclass(params)
+    timings["construct"] = time.perf_counter() - t
+    t = time.perf_counter()
+    form.is_valid()
+    timings["is_valid"] = time.perf_counter() - t
+    t = time.perf_counter()
+    form.errors
+    timings["errors"] = time.perf_counter() - t
+    t = time.perf_counter()
+    form.cleaned_data
+    timings["cleaned_data"] = time.perf_counter() - t
+    return timings
+
+
+def memory(formclass, params):
+    """(peak, retained) in KiB. retained is what the validated form keeps alive"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        form = formclass(params)
+        form.is_valid()
+        retained, _ = tracemalloc.get_traced_memory()
+        form.errors
+        form.cleaned_data
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del form
+    return peak / 1024.0, retained / 1024.0
+
+
+def measure(name, formclass, params, repeat):
+    best = {}
+    for _ in range(repeat):
+        for k, v in run_once(formclass, params).items():
+            best[k] = min(best.get(k, v), v)
+    best["total"] = sum(best.values())
+    best["peak_kb"], best["retained_kb"] = memory(formclass, params)
+    best["name"] = name
+    return best
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=here).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    base = {r["name"]: r for r in baseline["results"]}
+    print("\n{:<55} {:>12} {:>12} {:>8} {:>8} {:>9}".format(
+        "case", "total(base)", "total", "ratio", "mem", "retained"
+    ))
+    for r in results["results"]:
+        b = base.get(r["name"])
+        if b is None:
+            continue
+        retained = r["retained_kb"] / b["retained_kb"] if b.get("retained_kb") else float("nan")
+        print("{:<55} {:>12.6f} {:>12.6f} {:>8.2f} {:>8.2f} {:>9.2f}".format(
+            r["name"], b["total"], r["total"], r["total"] / b["total"], r["peak_kb"] / b["peak_kb"], retained
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes (no 100k case)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--filter", default=None, help="run only cases whose name contains this")
+    parser.add_argument("--output", default=None, help="write results as json")
+    parser.add_argument("--compare", default=None, help="json written by a previous run")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [],
+    }
+    print("{:<55} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "case", "construct", "is_valid", "errors", "cleaned", "peak(KiB)", "kept(KiB)"
+    ))
+    for name, formclass, params in cases(quick=args.quick):
+        if args.filter and args.filter not in name:
+            continue
+        r = measure(name, formclass, params, args.repeat)
+        results["results"].append(r)
+        print("{:<55} {:>10.6f} {:>10.6f} {:>10.6f} {:>10.6f} {:>10.1f} {:>10.1f}".format(
+            name, r["construct"], r["is_valid"], r["errors"], r["cleaned_data"], r["peak_kb"], r["retained_kb"]
+        ))
+
+    if args.output:
+        with open(args.output, "w") as wf:
+            json.dump(results, wf, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as rf:
+            compare(results, json.load(rf))
+
+
+if __name__ == "__main__":
+    main()
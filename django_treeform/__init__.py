@@ -1,216 +1,1988 @@
 # -*- coding:utf-8 -*-
+import asyncio
+import copy
+import inspect
+from collections.abc import Mapping
 from functools import partial
 from django.utils.functional import cached_property
 from django import forms
+from .cache import ValidationCache  # NOQA
+from .trace import Tracer, current_tracer, format_path, set_tracer, tracing  # NOQA
+from .jsonload import JSONSource, SequenceErrors, iter_error_paths, loads as _loads_json
+from .jsonload import schema_from_shape as _schema_from_shape
+from .flatkeys import MAX_INDEX, route as _route_flat_keys, router_from_shape as _router_from_shape
+from .flatkeys import posted_path as _posted_path, splitter as _splitter
+from .errors import ErrorStore, add as _add_errors, collect as _collect_errors
+from .limits import TOO_MANY_ITEMS, read_items as _read_items, scan as _scan_limits
+from .shape import EXPECTED_OBJECT, check as _check_shape, shape_of, to_json_schema
+from .persist import save_bulk as _save_bulk
+from .pool import FormPool, is_rebindable as _is_rebindable, rebind_django_form as _rebind_django_form
+from .bulk import ValidationResult, validate_many as _validate_many  # NOQA
+from .columnar import ColumnPlan, to_numpy as _to_numpy
 
 
-class _OneField(object):
-    def __init__(self, field, keyname, params, clean=None):
-        self.field = field
-        self.keyname = keyname
-        self.value = params.get(keyname)
-        self.errors = []
-        self.cleaned_data = None
+class _MissingType(object):
+    def __reduce__(self):
+        # keeps identity across processes
+        return "_MISSING"
 
-    def is_valid(self):
-        try:
-            self.cleaned_data = self.field.clean(self.value)
-        except forms.ValidationError as e:
-            self.errors.append(e.args[0])
-        return not bool(self.errors)
+    def __repr__(self):
+        return "<MISSING>"
 
 
-class _Node(object):
-    def __init__(self, formclass, keyname, params, clean=None):
+_MISSING = _MissingType()
+
+
+class _cached_slot(object):
+    """cached_property for classes with __slots__, the value is kept in the slot `_<name>_cache`"""
+    def __init__(self, func):
+        self.func = func
+        self.slot = "_{}_cache".format(func.__name__)
+        self.__doc__ = func.__doc__
+
+    def __get__(self, ob, cls=None):
+        if ob is None:
+            return self
+        value = getattr(ob, self.slot, _MISSING)
+        if value is _MISSING:
+            value = self.func(ob)
+            setattr(ob, self.slot, value)
+        return value
+
+
+def _is_django_form(form):
+    # django's Form also has has_error(field) (since 1.8), so it cannot be used for duck typing
+    return isinstance(form, forms.BaseForm)
+
+
+class _Budget(object):
+    """error budget shared by a (sub)tree, for fail-fast validation"""
+    def __init__(self, max_errors, parent=None):
+        self.remaining = max_errors
+        self.parent = parent
+
+    @classmethod
+    def create(cls, max_errors, parent=None):
+        if max_errors is None:
+            return parent
+        return cls(max_errors, parent=parent)
+
+    @property
+    def exhausted(self):
+        return self.remaining <= 0 or (self.parent is not None and self.parent.exhausted)
+
+    def spend(self, n=1):
+        self.remaining -= n
+        if self.parent is not None:
+            self.parent.spend(n)
+
+
+def _max_errors(max_errors, fail_fast):
+    if fail_fast and max_errors is None:
+        return 1
+    return max_errors
+
+
+def _validate(form, budget):
+    if budget is None:
+        return form.is_valid()
+    if _is_django_form(form):
+        status = form.is_valid()
+        if not status:
+            budget.spend(len(form.errors))
+        return status
+    return form.is_valid(budget)
+
+
+def _call_hook(hook):
+    result = hook()
+    if inspect.isawaitable(result):
+        if hasattr(result, "close"):
+            result.close()
+        raise TypeError("{!r} is a coroutine, use ais_valid() instead of is_valid()".format(hook))
+    return result
+
+
+def _traced(tracer, key, kind, formclass, fn, *args):
+    state = tracer.enter(key)
+    try:
+        return fn(*args)
+    finally:
+        tracer.leave(state, kind, formclass)
+
+
+def _class_of(ob):
+    return getattr(ob, "formclass", None) or type(ob)
+
+
+def _clean_failed(ob, e, budget):
+    ob._add_non_form_error(e.args[0])
+    if budget is not None:
+        budget.spend()
+
+
+def _reject(ob, message, budget):
+    # an oversized payload, nothing under ob is built or validated
+    ob._add_non_form_error(message)
+    ob.is_cleaned = True
+    if budget is not None:
+        budget.spend()
+    return False
+
+
+def _run_clean(ob, budget=None):
+    """call ob.clean(). a raised ValidationError is recorded as a non form error of ob"""
+    tracer = current_tracer()
+    state = None if tracer is None or not ob._has_clean() else tracer.enter()
+    try:
+        _call_hook(ob.clean)
+    except forms.ValidationError as e:
+        _clean_failed(ob, e, budget)
+        return False
+    finally:
+        if state is not None:
+            tracer.leave(state, "clean", _class_of(ob))
+    return True
+
+
+async def _await_hook(result, semaphore=None):
+    if inspect.isawaitable(result):
+        if semaphore is None:
+            await result
+        else:
+            async with semaphore:
+                await result
+
+
+async def _arun_clean(ob, budget=None, semaphore=None):
+    """call ob.clean(), awaiting it if it is a coroutine (at most `semaphore` at once)"""
+    tracer = current_tracer()
+    state = None if tracer is None or not ob._has_clean() else tracer.enter()
+    try:
+        await _await_hook(ob.clean(), semaphore)
+    except forms.ValidationError as e:
+        _clean_failed(ob, e, budget)
+        return False
+    finally:
+        if state is not None:
+            tracer.leave(state, "clean", _class_of(ob))
+    return True
+
+
+class _Batch(object):
+    """validated items of a sequence, given to its batch_clean hook at once.
+    rows: [(index, cleaned_data), ...], cleaned_data is partial if the item is invalid"""
+    def __init__(self, sequence, rows):
+        self.sequence = sequence
+        self.rows = rows
+        self.n_errors = 0
+
+    def add_error(self, index, field, message):
+        """attach an error to the item at `index` (field=None for its non field errors)"""
+        self.n_errors += self.sequence._add_item_error(index, field, message)
+
+
+def _batch_failed(ob, batch, e):
+    ob._add_non_form_error(e.args[0])
+    batch.n_errors += 1
+
+
+def _batch_done(batch, budget):
+    if budget is not None and batch.n_errors:
+        budget.spend(batch.n_errors)
+    return batch.n_errors == 0
+
+
+def _run_batch_clean(ob, budget=None, indexes=None):
+    """call ob's batch_clean hook once with all validated items (or only `indexes`).
+    a raised ValidationError is a non form error of the sequence"""
+    if ob._batch_clean is None or (budget is not None and budget.exhausted):
+        return True
+    batch = _Batch(ob, ob._batch_rows(indexes))
+    tracer = current_tracer()
+    state = None if tracer is None else tracer.enter()
+    try:
+        _call_hook(partial(ob._batch_clean, batch))
+    except forms.ValidationError as e:
+        _batch_failed(ob, batch, e)
+    finally:
+        if state is not None:
+            tracer.leave(state, "batch_clean", ob.formclass)
+    return _batch_done(batch, budget)
+
+
+async def _arun_batch_clean(ob, budget=None, semaphore=None):
+    if ob._batch_clean is None or (budget is not None and budget.exhausted):
+        return True
+    batch = _Batch(ob, ob._batch_rows(None))
+    tracer = current_tracer()
+    state = None if tracer is None else tracer.enter()
+    try:
+        await _await_hook(ob._batch_clean(batch), semaphore)
+    except forms.ValidationError as e:
+        _batch_failed(ob, batch, e)
+    finally:
+        if state is not None:
+            tracer.leave(state, "batch_clean", ob.formclass)
+    return _batch_done(batch, budget)
+
+
+async def _avalidate_each(forms, budget, semaphore):
+    """validate forms. subtrees are run concurrently, or one by one if there is an error budget"""
+    status = True
+    pending = []
+    for form in forms:
+        if not hasattr(form, "ais_valid"):
+            valid = _validate(form, budget)
+        elif budget is None:
+            pending.append(form.ais_valid(None, semaphore))
+            continue
+        else:
+            valid = await form.ais_valid(budget, semaphore)
+        if not valid:
+            status = False
+    if pending:
+        results = await asyncio.gather(*pending)
+        status = all(results) and status
+    return status
+
+
+def _semaphore(semaphore, concurrency):
+    if semaphore is None and concurrency is not None:
+        return asyncio.Semaphore(concurrency)
+    return semaphore
+
+
+def _clear_cache(ob):
+    # drop cached values, errors/cleaned_data are recomputed on next access
+    d = getattr(ob, "__dict__", None)
+    if d is None:
+        ob._errors_cache = ob._cleaned_data_cache = ob._error_store_cache = _MISSING
+    else:
+        d.pop("errors", None)
+        d.pop("cleaned_data", None)
+        d.pop("error_store", None)
+
+
+def _patched_django_form(form, path, value):
+    """rebuild (and validate) a django form with one field replaced"""
+    if len(path) != 1:
+        raise KeyError(path)
+    data = form.data.copy()
+    data[path[0]] = value
+    new_form = form.__class__(data)
+    new_form.is_valid()
+    return new_form
+
+
+def _n_errors(form):
+    # number of errors under a validated form, O(1): django caches its ErrorDict, ours count bottom-up
+    if _is_django_form(form):
+        return len(form.errors)
+    return form.n_errors
+
+
+def _count_errors(errors):
+    if isinstance(errors, dict):
+        return sum(_count_errors(v) for v in errors.values())
+    elif isinstance(errors, list):
+        return sum(_count_errors(v) for v in errors)
+    return 0 if errors is None else 1
+
+
+def _make_form(formclass, params, cache=None):
+    if cache is not None and getattr(formclass, "pure_validation", False):
+        return _CachedForm(cache, formclass, params)
+    return formclass(params)
+
+
+def _make_item(formclass, params, cache=None):
+    # an item of a sequence which is not an object (e.g. null in JSON) is invalid, no form is built
+    if not isinstance(params, Mapping):
+        return _NotAnObject()
+    return _make_form(formclass, params, cache=cache)
+
+
+class _NotAnObject(object):
+    """an invalid item of a sequence, same as a non-object row of a fast sequence (see _FormPlan.clean())"""
+    __slots__ = ("errors", "n_errors", "is_cleaned")
+
+    def __init__(self):
+        self.errors = {"__all__": [EXPECTED_OBJECT]}
+        self.n_errors = 1
+        self.is_cleaned = False
+
+    def is_valid(self, budget=None):
+        if not self.is_cleaned:
+            self.is_cleaned = True
+            if budget is not None:
+                budget.spend()
+        return False
+
+    def add_error(self, field, message):
+        key = "__all__" if field is None else field
+        if key not in self.errors:
+            self.n_errors += 1
+        self.errors[key] = self.errors.get(key, []) + [message]
+
+    def patch(self, path, value):
+        raise KeyError(path)
+
+    @property
+    def cleaned_data(self):
+        return {}
+
+    def has_error(self):
+        return True
+
+
+def _rebound_form(form, formclass, params, cache=None):
+    """form (built by _make_form()) bound to new params, reset in place if possible. see pool.py"""
+    rebound = getattr(form, "_rebound", None)
+    if rebound is not None:
+        return rebound(params)
+    if _is_django_form(form) and _is_rebindable(type(form)):
+        return _rebind_django_form(form, params)
+    return _make_form(formclass, params, cache=cache)
+
+
+class _CachedForm(object):
+    """a form whose validation result is shared through a ValidationCache.
+    the real form is built only on cache miss (or when patched)"""
+    __slots__ = ("cache", "formclass", "data", "form", "result", "n_errors", "is_cleaned")
+
+    def __init__(self, cache, formclass, params):
+        self.cache = cache
         self.formclass = formclass
-        self.keyname = keyname
-        self.form = formclass(params[keyname])
-        self._clean = clean
+        self.data = params
+        self.form = None
+        self.result = None
+        self.n_errors = 0
         self.is_cleaned = False
-        self._self_errors = []
 
-    def is_valid(self):
+    def is_valid(self, budget=None):
         if self.is_cleaned:
             return not self.has_error()
-        status = self.form.is_valid()
         self.is_cleaned = True
-        try:
-            self.clean()
-        except forms.ValidationError as e:
-            self._self_errors.append(e.args[0])
-            status = False
+        key = self.cache.key(self.formclass, self.data)
+        result = None if key is None else self.cache.get(key)
+        if result is not None:
+            self.result = copy.deepcopy(result)
+            status, _, _, self.n_errors = result
+            if not status and budget is not None:
+                budget.spend(self.n_errors)
+            return status
+        self.form = _make_form(self.formclass, self.data)
+        status = _validate(self.form, budget)
+        self.n_errors = _n_errors(self.form)
+        if key is not None and (budget is None or not budget.exhausted):
+            result = (status, self.form.cleaned_data, _plain_errors(self.form.errors), self.n_errors)
+            self.cache.set(key, copy.deepcopy(result))
         return status
 
-    def clean(self):
-        if self._clean is None:
+    def patch(self, path, value):
+        if self.form is None:
+            self.form = self.formclass(self.data)
+            self.form.is_valid()
+        if _is_django_form(self.form):
+            self.form = _patched_django_form(self.form, path, value)
+        else:
+            self.form.patch(path, value)
+        self.data = self.form.data if _is_django_form(self.form) else self.form.params
+        self.result = None
+        self.n_errors = _n_errors(self.form)
+        return not self.has_error()
+
+    def add_error(self, field, message):
+        if self.result is None:
+            self.form.add_error(field, message)
+            self.n_errors = _n_errors(self.form)
             return
-        self._clean(self)
+        status, cleaned_data, errors, n_errors = self.result
+        key = "__all__" if field is None else field
+        if not errors.get(key):
+            n_errors += 1
+        errors[key] = list(errors.get(key) or []) + [message]
+        cleaned_data.pop(field, None)
+        self.result = (False, cleaned_data, errors, n_errors)
+        self.n_errors = n_errors
 
     @property
     def errors(self):
         if not self.is_cleaned:
             raise RuntimeError("is_valid() is not called")
-        errors = self.form.errors.copy()
-
-        if bool(self._self_errors):
-            if "__all__" in errors:
-                errors["__all__"].extend(self._self_errors)
-            else:
-                errors["__all__"] = self._self_errors[:]
-        if hasattr(self.form, "non_form_errors") and bool(self.form.non_form_errors):
-            if "__all__" in errors:
-                errors["__all__"].extend(self.form.non_form_errors[:])
-            else:
-                errors["__all__"] = self.form.non_form_errors
-        return errors
+        if self.result is not None:
+            return self.result[2]
+        return self.form.errors
 
-    @cached_property
+    @property
     def cleaned_data(self):
         if not self.is_cleaned:
             raise RuntimeError("is_valid() is not called")
+        if self.result is not None:
+            return self.result[1]
         return self.form.cleaned_data
 
     def has_error(self):
-        if hasattr(self.formclass, "has_error"):
-            return self.form.has_error() or bool(self.non_form_errors)
-        else:
-            return any(self.errors.values())
+        return self.n_errors > 0
 
 
-class _Sequence(object):
-    def __init__(self, formclass, list_of_params, clean=None):
+class _Spec(object):
+    """metadata of a Node/OneField declared in a TreeForm class, shared by all of its instances"""
+    __slots__ = ("formclass", "keyname", "clean", "max_errors", "cache", "cost", "model", "fk")
+
+    def __init__(self, formclass, keyname, clean=None, max_errors=None, fail_fast=False, cache=None, cost=None,
+                 model=None, fk=None):
         self.formclass = formclass
-        self.forms = [formclass(params) for params in list_of_params]
-        self._clean = clean
-        self.non_form_errors = []
+        self.keyname = keyname
+        self.clean = clean
+        self.max_errors = _max_errors(max_errors, fail_fast)
+        self.cache = cache
+        self.cost = cost
+        self.model = model
+        self.fk = fk
+
+
+class _OneField(object):
+    """a field built from cls.factories by hand. declared fields are cleaned inline by the
+    TreeForm (see _Plan.fields), so this is only kept for compatibility"""
+    __slots__ = ("spec", "value", "cleaned_data", "errors", "is_cleaned")
+
+    def __init__(self, spec, params):
+        self.spec = spec
+        self.value = params.get(spec.keyname)
+        self.cleaned_data = None
+        self.errors = []
         self.is_cleaned = False
 
-    def is_valid(self):
+    @property
+    def field(self):
+        return self.spec.formclass
+
+    @property
+    def keyname(self):
+        return self.spec.keyname
+
+    @property
+    def n_errors(self):
+        return len(self.errors)
+
+    def is_valid(self, budget=None):
+        if not self.is_cleaned:
+            self.is_cleaned = True
+            try:
+                self.cleaned_data = self.field.clean(self.value)
+            except forms.ValidationError as e:
+                self.errors = [e.args[0]]
+                if budget is not None:
+                    budget.spend()
+        return not self.errors
+
+    def has_error(self):
+        return bool(self.errors)
+
+
+class _Node(object):
+    __slots__ = ("spec", "form", "n_errors", "is_cleaned", "_self_errors", "_errors_cache", "_cleaned_data_cache",
+                 "_error_store_cache")
+
+    def __init__(self, spec, params):
+        self.spec = spec
+        self.form = _make_form(spec.formclass, params[spec.keyname], cache=spec.cache)
+        self.n_errors = 0
+        self.is_cleaned = False
+        self._self_errors = None  # allocated on first error
+
+    @property
+    def formclass(self):
+        return self.spec.formclass
+
+    @property
+    def keyname(self):
+        return self.spec.keyname
+
+    @property
+    def max_errors(self):
+        return self.spec.max_errors
+
+    def is_valid(self, budget=None):
         if self.is_cleaned:
             return not self.has_error()
-        status = all([form.is_valid() for form in self.forms])
-        self.is_cleaned = True
+        tracer = current_tracer()
+        if tracer is not None:
+            return _traced(tracer, self.spec.keyname, "node", self.spec.formclass, self._run, budget)
+        return self._run(budget)
+
+    def _run(self, budget):
+        budget = _Budget.create(self.spec.max_errors, budget)
+        status = _validate(self.form, budget)
+        if not self._validated(budget):
+            return status
+        return _run_clean(self, budget) and status
+
+    async def ais_valid(self, budget=None, semaphore=None, concurrency=None):
+        if self.is_cleaned:
+            return not self.has_error()
+        semaphore = _semaphore(semaphore, concurrency)
+        tracer = current_tracer()
+        if tracer is None:
+            return await self._arun(budget, semaphore)
+        state = tracer.enter(self.spec.keyname)
         try:
-            self.clean()
-        except forms.ValidationError as e:
-            self.non_form_errors.append(e.args[0])
-            status = False
+            return await self._arun(budget, semaphore)
+        finally:
+            tracer.leave(state, "node", self.spec.formclass)
+
+    async def _arun(self, budget, semaphore):
+        budget = _Budget.create(self.spec.max_errors, budget)
+        status = await _avalidate_each([self.form], budget, semaphore)
+        if not self._validated(budget):
+            return status
+        return (await _arun_clean(self, budget, semaphore)) and status
+
+    def _validated(self, budget):
+        # False if the clean hook is not needed (error budget is exhausted)
+        self.is_cleaned = True
+        self.n_errors = _n_errors(self.form)
+        return budget is None or not budget.exhausted
+
+    def _has_clean(self):
+        return self.spec.clean is not None
+
+    def _add_non_form_error(self, message):
+        if self._self_errors is None:
+            self._self_errors = []
+        self._self_errors.append(message)
+        self.n_errors += 1
+        _clear_cache(self)
+
+    def clean(self):
+        hook = self.spec.clean
+        if hook is None:
+            return
+        return hook(self)
+
+    def validate_paths(self, paths, budget=None):
+        if not hasattr(self.form, "validate_paths"):
+            return self.is_valid(budget)
+        budget = _Budget.create(self.spec.max_errors, budget)
+        status = self.form.validate_paths(paths, budget)
+        self.is_cleaned = True
+        self.n_errors = _n_errors(self.form)
         return status
 
+    def patch(self, path, value):
+        """replace a value under this node, and re-validate only the affected subtree"""
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        if _is_django_form(self.form):
+            self.form = _patched_django_form(self.form, path, value)
+        else:
+            self.form.patch(path, value)
+        _clear_cache(self)
+        self._self_errors = None
+        self.n_errors = _n_errors(self.form)
+        _run_clean(self)
+        return not self.has_error()
+
+    @_cached_slot
+    def errors(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        errors = self.form.errors
+        if isinstance(self.form, _BaseSequence):
+            # errors of the sequence itself (its hooks, max_items) and of this node, next to the items
+            messages = self.form.non_form_errors + (self._self_errors or [])
+            return SequenceErrors({"__all__": messages, "items": errors}) if messages else errors
+        if not self._self_errors:
+            return errors
+        errors = errors.copy()
+        # TreeForm's errors already include its own non_form_errors
+        errors["__all__"] = list(errors.get("__all__", [])) + self._self_errors
+        return errors
+
+    @_cached_slot
+    def error_store(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        return ErrorStore.of(self)
+
+    def _collect_errors(self, prefix, into):
+        if _n_errors(self.form):
+            _collect_errors(self.form, prefix, into)
+        if self._self_errors:
+            _add_errors(into, prefix, self._self_errors)
+
+    def _rebound(self, params):
+        # reset to the params of a pooled parent, keeping the built form
+        spec = self.spec
+        self.form = _rebound_form(self.form, spec.formclass, params[spec.keyname], cache=spec.cache)
+        self.n_errors = 0
+        self.is_cleaned = False
+        self._self_errors = None
+        _clear_cache(self)
+        return self
+
+    @_cached_slot
+    def cleaned_data(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        return self.form.cleaned_data
+
+    def has_error(self):
+        return self.n_errors > 0
+
+
+class _BaseSequence(object):
+    """state shared by sequences. per-class settings (formclass, hooks, ...) are kept in the SequenceWrapper"""
+    __slots__ = ("wrapper", "list_of_params", "n_errors", "is_cleaned", "_non_form_errors", "_skipped",
+                 "_errors_cache", "_cleaned_data_cache", "_error_store_cache")
+
+    def __init__(self, wrapper, list_of_params):
+        self.wrapper = wrapper
+        self.list_of_params = list_of_params
+        self.n_errors = 0
+        self.is_cleaned = False
+        self._non_form_errors = None  # allocated on first error
+        self._skipped = None
+
+    @property
+    def formclass(self):
+        return self.wrapper.formclass
+
+    @property
+    def max_errors(self):
+        return self.wrapper.max_errors
+
+    @property
+    def _batch_clean(self):
+        return self.wrapper.batch_clean
+
+    @property
+    def non_form_errors(self):
+        return self._non_form_errors or []
+
+    @property
+    def skipped(self):
+        return self._skipped or []
+
+    def _add_non_form_error(self, message):
+        if self._non_form_errors is None:
+            self._non_form_errors = []
+        self._non_form_errors.append(message)
+        self.n_errors += 1
+        _clear_cache(self)
+
+    def _has_clean(self):
+        return self.wrapper.clean is not None
+
+    def _validated(self, budget):
+        self.is_cleaned = True
+        self.n_errors = self._sum_errors()
+        return budget is None or not budget.exhausted
+
     def clean(self):
-        if self._clean is None:
+        hook = self.wrapper.clean
+        if hook is None:
             return
-        self._clean(self)
+        return hook(self)
+
+    def has_error(self):
+        return self.n_errors > 0
+
+    def save_bulk(self, batch_size=None, using=None):
+        """create the model instances of the validated items (and of their bound children) with
+        bulk_create, in one transaction. returns the instances of the items"""
+        return _save_bulk(self, batch_size=batch_size, using=using)
+
+    def _check_size(self, budget):
+        # a generator is read once, and not beyond max_items + 1
+        self.list_of_params, message = _read_items(self.list_of_params, self.wrapper.max_items)
+        return message is None or _reject(self, message, budget)
+
+    @_cached_slot
+    def error_store(self):
+        """errors by key path ((index, field), ...), only the invalid items are visited"""
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        return ErrorStore.of(self)
+
+    def _collect_errors(self, prefix, into):
+        self._collect_item_errors(prefix, into)
+        if self._non_form_errors:
+            _add_errors(into, prefix, self._non_form_errors)
+
+    def _rebound(self, list_of_params):
+        return self.wrapper(list_of_params)
+
+
+class _Sequence(_BaseSequence):
+    __slots__ = ("_forms", )
+
+    def __init__(self, wrapper, list_of_params):
+        super(_Sequence, self).__init__(wrapper, list_of_params)
+        self._forms = []  # built lazily, items skipped by fail-fast are never built
 
     @property
+    def cache(self):
+        return self.wrapper.cache
+
+    def is_valid(self, budget=None):
+        if self.is_cleaned:
+            return not self.has_error()
+        budget = _Budget.create(self.wrapper.max_errors, budget)
+        if not self._check_size(budget):
+            return False
+        status = True
+        tracer = current_tracer()
+        formclass = self.wrapper.formclass
+        for i, form in enumerate(self._iter_forms(budget)):
+            if tracer is None:
+                valid = _validate(form, budget)
+            else:
+                valid = _traced(tracer, i, "item", formclass, _validate, form, budget)
+            if not valid:
+                status = False
+        status = _run_batch_clean(self, budget) and status
+        if not self._validated(budget):
+            return False
+        return _run_clean(self, budget) and status
+
+    async def ais_valid(self, budget=None, semaphore=None, concurrency=None):
+        if self.is_cleaned:
+            return not self.has_error()
+        semaphore = _semaphore(semaphore, concurrency)
+        budget = _Budget.create(self.wrapper.max_errors, budget)
+        if not self._check_size(budget):
+            return False
+        status = await _avalidate_each(self._iter_forms(budget), budget, semaphore)
+        status = (await _arun_batch_clean(self, budget, semaphore)) and status
+        if not self._validated(budget):
+            return False
+        return (await _arun_clean(self, budget, semaphore)) and status
+
+    def _iter_forms(self, budget):
+        # builds forms on demand, and stops when the error budget is exhausted
+        formclass = self.wrapper.formclass
+        cache = self.wrapper.cache
+        built = self._forms
+        for i, params in enumerate(self.list_of_params):
+            if budget is not None and budget.exhausted:
+                self._skipped = list(range(i, len(self.list_of_params)))
+                return
+            if i < len(built):
+                form = built[i]
+            else:
+                form = _make_item(formclass, params, cache=cache)
+                built.append(form)
+            yield form
+
+    def _rebound(self, list_of_params):
+        # the built forms are reset to the new items
+        forms = self._forms
+        super(_Sequence, self).__init__(self.wrapper, list_of_params)
+        _clear_cache(self)
+        if isinstance(list_of_params, (list, tuple)):
+            formclass = self.wrapper.formclass
+            cache = self.wrapper.cache
+            self._forms = [
+                _rebound_form(form, formclass, params, cache=cache) if isinstance(params, Mapping)
+                else _make_item(formclass, params)
+                for form, params in zip(forms, list_of_params)
+            ]
+        else:
+            self._forms = []
+        return self
+
+    def _sum_errors(self):
+        n = sum(_n_errors(form) for form in self.validated_forms)
+        return n + len(self._skipped or ()) + len(self._non_form_errors or ())
+
+    @property
+    def forms(self):
+        built = self._forms
+        if len(built) < len(self.list_of_params):
+            built.extend(_make_item(self.formclass, params, cache=self.cache)
+                         for params in self.list_of_params[len(built):])
+        return built
+
+    @property
+    def validated_forms(self):
+        if not self._skipped:
+            return self._forms
+        return self._forms[:self._skipped[0]]
+
+    def _collect_item_errors(self, prefix, into):
+        for i, form in enumerate(self.validated_forms):
+            if _n_errors(form):
+                _collect_errors(form, prefix + (i, ), into)
+
+    def _batch_rows(self, indexes):
+        forms = self.validated_forms
+        if indexes is None:
+            indexes = range(len(forms))
+        return [(i, forms[i].cleaned_data) for i in indexes]
+
+    def _add_item_error(self, i, field, message):
+        form = self._forms[i]
+        n = _n_errors(form)
+        form.add_error(field, message)
+        return _n_errors(form) - n
+
+    def patch(self, path, value):
+        """replace a value under items[path[0]], and re-validate only that item
+        (batch_clean is called again with that item only)"""
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        for i in self.skipped:
+            _validate(self.forms[i], None)
+        self._skipped = None
+        i, rest = path[0], path[1:]
+        form = self.forms[i]
+        if not rest:
+            form = _make_item(self.formclass, value, cache=self.cache)
+            form.is_valid()
+        elif _is_django_form(form):
+            form = _patched_django_form(form, rest, value)
+        else:
+            form.patch(rest, value)
+        self.forms[i] = form
+        _clear_cache(self)
+        self._non_form_errors = None
+        _run_batch_clean(self, indexes=[i])
+        self.n_errors = self._sum_errors()
+        _run_clean(self)
+        return not self.has_error()
+
+    @_cached_slot
     def errors(self):
         if not self.is_cleaned:
             raise RuntimeError("is_valid() is not called")
-        return [form.errors for form in self.forms]
+        return [form.errors for form in self.validated_forms] + [None] * len(self.skipped)
 
-    @cached_property
+    @_cached_slot
     def cleaned_data(self):
         if not self.is_cleaned:
             raise RuntimeError("is_valid() is not called")
-        return [form.cleaned_data for form in self.forms]
+        return [form.cleaned_data for form in self.validated_forms] + [None] * len(self.skipped)
+
+
+class _FormPlan(object):
+    """fields of a plain django Form, cleaned with the shared field instances
+    (the form itself is never instantiated)"""
+    def __init__(self, formclass):
+        self.formclass = formclass
+        fields = []
+        for name, field in formclass.base_fields.items():
+            if type(field.widget).value_from_datadict is forms.Widget.value_from_datadict:
+                getvalue = None
+            else:
+                getvalue = field.widget.value_from_datadict
+            fields.append((name, field, getvalue))
+        self.fields = tuple(fields)
+        self.index = {name: i for i, (name, _, _) in enumerate(fields)}
+
+    @classmethod
+    def is_available(cls, formclass):
+        if not (isinstance(formclass, type) and issubclass(formclass, forms.Form)):
+            return False
+        if not _is_rebindable(formclass) or formclass.prefix is not None:
+            return False  # __init__ may set up the fields, a prefix changes the keys read
+        for name in ("full_clean", "_clean_fields", "_clean_form", "_post_clean", "clean"):
+            if getattr(formclass, name) is not getattr(forms.Form, name):
+                return False
+        for name, field in formclass.base_fields.items():
+            if hasattr(formclass, "clean_%s" % name):
+                return False
+            if field.disabled or isinstance(field, forms.FileField):
+                return False
+        return True
+
+    def clean(self, params):
+        if not isinstance(params, Mapping):  # e.g. null in JSON
+            return (_MISSING, ) * len(self.fields), {"__all__": [EXPECTED_OBJECT]}
+        values = []
+        errors = None
+        for name, field, getvalue in self.fields:
+            if getvalue is None:
+                value = params.get(name)
+            else:
+                value = getvalue(params, {}, name)
+            try:
+                values.append(field.clean(value))
+            except forms.ValidationError as e:
+                values.append(_MISSING)
+                if errors is None:
+                    errors = {}
+                errors[name] = e.messages
+        return tuple(values), errors
+
+    def as_dict(self, values):
+        return {name: v for (name, _, _), v in zip(self.fields, values) if v is not _MISSING}
+
+    def without(self, values, name):
+        """values with the field `name` marked as invalid"""
+        try:
+            i = self.index[name]
+        except KeyError:
+            raise ValueError("{!r} has no field named {!r}".format(self.formclass.__name__, name))
+        return values[:i] + (_MISSING, ) + values[i + 1:]
+
+
+class _FastSequence(_BaseSequence):
+    """Sequence of a plain django Form. each item is stored as a tuple of cleaned values,
+    errors only for invalid items"""
+    __slots__ = ("owns_params", "rows", "row_errors", "n_row_errors")
+
+    def __init__(self, wrapper, list_of_params):
+        super(_FastSequence, self).__init__(wrapper, list_of_params)
+        self.owns_params = False
+        self.rows = []
+        self.row_errors = {}
+        self.n_row_errors = 0
+
+    @property
+    def formplan(self):
+        return self.wrapper.formplan
+
+    def is_valid(self, budget=None):
+        if self.is_cleaned:
+            return not self.has_error()
+        budget = _Budget.create(self.wrapper.max_errors, budget)
+        if not self._check_size(budget):
+            return False
+        self._validate_rows(budget)
+        _run_batch_clean(self, budget)
+        status = not self.n_row_errors and not self._skipped and not self._non_form_errors
+        if not self._validated(budget):
+            return status
+        return _run_clean(self, budget) and status
+
+    async def ais_valid(self, budget=None, semaphore=None, concurrency=None):
+        if self.is_cleaned:
+            return not self.has_error()
+        semaphore = _semaphore(semaphore, concurrency)
+        budget = _Budget.create(self.wrapper.max_errors, budget)
+        if not self._check_size(budget):
+            return False
+        await self._avalidate_rows(budget)
+        await _arun_batch_clean(self, budget, semaphore)
+        status = not self.n_row_errors and not self._skipped and not self._non_form_errors
+        if not self._validated(budget):
+            return status
+        return (await _arun_clean(self, budget, semaphore)) and status
+
+    async def _avalidate_rows(self, budget):
+        self._validate_rows(budget)
+
+    def _sum_errors(self):
+        return self.n_row_errors + len(self._skipped or ()) + len(self._non_form_errors or ())
+
+    def _collect_item_errors(self, prefix, into):
+        row_errors = self.row_errors
+        for i in sorted(row_errors):
+            for path, messages in iter_error_paths(row_errors[i], prefix + (i, )):
+                _add_errors(into, path, messages)
+
+    def _validate_row(self, params):
+        return self.wrapper.formplan.clean(params)
+
+    def _count_row_errors(self, errors):
+        return len(errors)
+
+    def patch(self, path, value):
+        """replace a value under items[path[0]], and re-validate only that row
+        (batch_clean is called again with that row only)"""
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        if not self.owns_params:  # copy on write, the given list is not modified
+            self.list_of_params = list(self.list_of_params)
+            self.owns_params = True
+        list_of_params = self.list_of_params
+        for i in self.skipped:
+            self._set_row(i, self._validate_row(list_of_params[i]))
+        self._skipped = None
+        i, rest = path[0], path[1:]
+        if not rest:
+            params = value
+        elif len(rest) == 1 and isinstance(list_of_params[i], Mapping):
+            params = list_of_params[i].copy()
+            params[rest[0]] = value
+        else:
+            raise KeyError(path)
+        list_of_params[i] = params
+        self._set_row(i, self._validate_row(params))
+        _clear_cache(self)
+        self._non_form_errors = None
+        _run_batch_clean(self, indexes=[i])
+        self.n_errors = self._sum_errors()
+        _run_clean(self)
+        return not self.has_error()
+
+    def _set_row(self, i, result):
+        row, errors = result
+        self._put_row(i, row, errors)
+        if i in self.row_errors:
+            self.n_row_errors -= self._count_row_errors(self.row_errors.pop(i))
+        if errors is not None:
+            self.row_errors[i] = errors
+            self.n_row_errors += self._count_row_errors(errors)
+
+    def _put_row(self, i, row, errors):
+        if i == len(self.rows):
+            self.rows.append(row)
+        else:
+            self.rows[i] = row
+
+    def _validate_rows(self, budget):
+        clean = self.wrapper.formplan.clean
+        rows = self.rows
+        row_errors = self.row_errors
+        tracer = current_tracer()
+        for i, params in enumerate(self.list_of_params):
+            if budget is not None and budget.exhausted:
+                self._skipped = list(range(i, len(self.list_of_params)))
+                break
+            if tracer is None:
+                values, errors = clean(params)
+            else:
+                values, errors = _traced(tracer, i, "item", self.wrapper.formclass, clean, params)
+            rows.append(values)
+            if errors is not None:
+                row_errors[i] = errors
+                self.n_row_errors += len(errors)
+                if budget is not None:
+                    budget.spend(len(errors))
+
+    def _batch_rows(self, indexes):
+        rows = self.rows
+        if indexes is None:
+            indexes = range(len(rows))
+        return [(i, self._as_dict(rows[i])) for i in indexes]
+
+    def _as_dict(self, row):
+        return self.wrapper.formplan.as_dict(row)
+
+    def _without(self, row, field):
+        return self.wrapper.formplan.without(row, field)
+
+    def _invalidate(self, i, field):
+        self.rows[i] = self._without(self.rows[i], field)
+
+    def _add_item_error(self, i, field, message):
+        if field is not None:
+            self._invalidate(i, field)
+        key = "__all__" if field is None else field
+        errors = self.row_errors.get(i)
+        if errors is None:
+            errors = self.row_errors[i] = {}
+        if errors.get(key):
+            errors[key] = list(errors[key]) + [message]
+            return 0
+        errors[key] = [message]
+        self.n_row_errors += 1
+        return 1
+
+    @_cached_slot
+    def errors(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        row_errors = self.row_errors
+        return [row_errors.get(i, {}) for i in range(len(self.rows))] + [None] * len(self.skipped)
+
+    @_cached_slot
+    def cleaned_data(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        as_dict = self._as_dict
+        return [as_dict(values) for values in self.rows] + [None] * len(self.skipped)
+
+
+class _ColumnarSequence(_FastSequence):
+    """Sequence of a plain django Form, stored column by column (see columnar.py).
+    cleaned_data is {name: column}, `masks` ({name: bytearray}) marks the valid cells.
+    items are validated all at once, so the error budget is spent but nothing is skipped"""
+    __slots__ = ("columns", "masks", "n_rows")
+
+    def __init__(self, wrapper, list_of_params):
+        super(_ColumnarSequence, self).__init__(wrapper, list_of_params)
+        self.columns = {}
+        self.masks = {}
+        self.n_rows = 0
+
+    def _validate_rows(self, budget):
+        columnplan = self.wrapper.columnplan
+        list_of_params = self.list_of_params
+        # rows which are not objects (e.g. null) are cleaned as {}, then invalidated
+        not_objects = [i for i, params in enumerate(list_of_params) if not isinstance(params, Mapping)]
+        if not_objects:
+            list_of_params = list(list_of_params)
+            for i in not_objects:
+                list_of_params[i] = {}
+        clean_column = columnplan.clean_column
+        tracer = current_tracer()
+        columns = {}
+        masks = {}
+        row_errors = self.row_errors
+        for i, (name, _, _, _, _, _) in enumerate(columnplan.columns):
+            if tracer is None:
+                columns[name], masks[name] = clean_column(i, list_of_params, row_errors)
+            else:
+                columns[name], masks[name] = _traced(
+                    tracer, name, "field", self.wrapper.formclass, clean_column, i, list_of_params, row_errors
+                )
+        for i in not_objects:
+            row_errors[i] = {"__all__": [EXPECTED_OBJECT]}
+            for name in columns:
+                columnplan.invalidate(columns, masks, i, name)
+        self.columns = columns
+        self.masks = masks
+        self.n_rows = len(list_of_params)
+        self.n_row_errors = sum(len(errors) for errors in row_errors.values())
+        if budget is not None:
+            budget.spend(self.n_row_errors)
+
+    def _put_row(self, i, row, errors):
+        self.wrapper.columnplan.put_row(self.columns, self.masks, i, row, errors)
+
+    def _invalidate(self, i, field):
+        self.wrapper.columnplan.invalidate(self.columns, self.masks, i, field)
+
+    def _batch_rows(self, indexes):
+        if indexes is None:
+            indexes = range(self.n_rows)
+        row = self.wrapper.columnplan.row
+        return [(i, row(self.columns, self.masks, i)) for i in indexes]
+
+    def to_numpy(self):
+        """cleaned_data as numpy arrays (numpy is needed)"""
+        return _to_numpy(self.cleaned_data)
+
+    @_cached_slot
+    def errors(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        row_errors = self.row_errors
+        return [row_errors.get(i, {}) for i in range(self.n_rows)]
+
+    @_cached_slot
+    def cleaned_data(self):
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        return self.columns
+
+
+class _SequenceStream(object):
+    """iterator of (index, cleaned_data, errors), validating one item at a time.
+
+    reducer(value, cleaned_data, errors) folds items into `value`, finalize(value) runs
+    after the last item. both may raise ValidationError (collected in `non_form_errors`).
+    """
+    def __init__(self, wrapper, iterable, reducer=None, initial=None, finalize=None):
+        self.wrapper = wrapper
+        self.iterator = enumerate(iterable)
+        self.reducer = reducer
+        self.finalize = finalize
+        self.value = initial
+        self.n_items = 0
+        self.n_invalid = 0
+        self.non_form_errors = []
+        self.is_cleaned = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            i, params = next(self.iterator)
+        except StopIteration:
+            self._finish()
+            raise
+        max_items = self.wrapper.max_items
+        if max_items is not None and i >= max_items:
+            # the rest is neither read nor validated
+            self.non_form_errors.append(TOO_MANY_ITEMS.format(max_items, "more"))
+            self._finish()
+            raise StopIteration
+        valid, cleaned_data, errors = self.wrapper._validate_one(params)
+        self.n_items += 1
+        if not valid:
+            self.n_invalid += 1
+        if self.reducer is not None:
+            try:
+                self.value = self.reducer(self.value, cleaned_data, errors)
+            except forms.ValidationError as e:
+                self.non_form_errors.append(e.args[0])
+        return i, cleaned_data, errors
+
+    next = __next__
+
+    def _finish(self):
+        if self.is_cleaned:
+            return
+        self.is_cleaned = True
+        if self.finalize is None:
+            return
+        try:
+            self.finalize(self.value)
+        except forms.ValidationError as e:
+            self.non_form_errors.append(e.args[0])
+
+    def is_valid(self):
+        for _ in self:
+            pass
+        return not self.has_error()
 
     def has_error(self):
-        if hasattr(self.formclass, "has_error"):
-            return any(f.has_error() for f in self.forms) or bool(self.non_form_errors)
+        return bool(self.n_invalid) or bool(self.non_form_errors)
+
+
+def _plain_errors(errors):
+    # ErrorDict/ErrorList (and nested TreeForm errors) as builtin dicts/lists of strings
+    if isinstance(errors, SequenceErrors):
+        return SequenceErrors({k: _plain_errors(v) for k, v in errors.items()})
+    if isinstance(errors, dict):
+        return {k: _plain_errors(v) for k, v in errors.items()}
+    elif isinstance(errors, list):
+        return [_plain_errors(e) for e in errors]
+    return errors
+
+
+def _validate_chunk(formclass, fast, list_of_params):
+    # runs in worker processes, so only picklable things go in and out
+    wrapper = SequenceWrapper(formclass, fast=fast)
+    return [wrapper.validate_row(params) for params in list_of_params]
+
+
+class _ParallelSequence(_FastSequence):
+    """Sequence validated in chunks by a concurrent.futures executor.
+    rows are tuples (fast mode) or cleaned_data dicts; the clean hook runs in this process.
+    row_errors has the errors of every TreeForm item, the valid ones count no error"""
+    __slots__ = ()
+
+    def _validate_row(self, params):
+        return self.wrapper.validate_row(params)
+
+    def _count_row_errors(self, errors):
+        # errors of a TreeForm item also have empty entries for its valid fields and nodes
+        formclass = self.formclass
+        if self.formplan is not None or (isinstance(formclass, type) and issubclass(formclass, forms.BaseForm)):
+            return len(errors)
+        return _count_errors(errors)
+
+    def _as_dict(self, row):
+        if self.formplan is None:
+            return row
+        return self.formplan.as_dict(row)
+
+    def _without(self, row, field):
+        if self.formplan is None:
+            formclass = self.formclass
+            fields = formclass.plan.field_map if isinstance(formclass, TreeFormMeta) else formclass.base_fields
+            if field not in fields:
+                raise ValueError("{!r} has no field named {!r}".format(formclass.__name__, field))
+            return {k: v for k, v in row.items() if k != field}
+        return self.formplan.without(row, field)
+
+    async def _avalidate_rows(self, budget):
+        # waiting for the executor must not block the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._validate_rows, budget)
+
+    def _validate_rows(self, budget):
+        list_of_params = self.list_of_params
+        wrapper = self.wrapper
+        fast = wrapper.formplan is not None
+        chunksize = wrapper.chunksize
+        starts = range(0, len(list_of_params), chunksize)
+        futures = [
+            wrapper.executor.submit(_validate_chunk, wrapper.formclass, fast, list_of_params[i:i + chunksize])
+            for i in starts
+        ]
+        rows = self.rows
+        row_errors = self.row_errors
+        try:
+            for start, future in zip(starts, futures):
+                for i, (row, errors) in enumerate(future.result(), start):
+                    if budget is not None and budget.exhausted:
+                        self._skipped = list(range(i, len(list_of_params)))
+                        return
+                    rows.append(row)
+                    if errors is not None:
+                        row_errors[i] = errors
+                        n = self._count_row_errors(errors)
+                        self.n_row_errors += n
+                        if budget is not None:
+                            budget.spend(n)
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+class SequenceWrapper(object):
+    def __init__(self, formclass, clean=None, fast=False, max_errors=None, fail_fast=False,
+                 executor=None, chunksize=1000, cache=None, batch_clean=None, columnar=False, max_items=None,
+                 model=None, fk=None):
+        self.formclass = formclass
+        self.max_items = max_items
+        self.model = model
+        self.fk = fk
+        self.clean = clean
+        self.batch_clean = batch_clean
+        self.max_errors = _max_errors(max_errors, fail_fast)
+        self.cache = cache
+        self.executor = executor
+        self.chunksize = chunksize
+        self.columnplan = None
+        if columnar:
+            if not _FormPlan.is_available(formclass):
+                raise ValueError("columnar=True needs a plain django Form without hooks, got {!r}".format(formclass))
+            if executor is not None:
+                raise ValueError("columnar=True cannot be used with an executor")
+            fast = True
+        if fast and _FormPlan.is_available(formclass):
+            self.formplan = _FormPlan(formclass)
         else:
-            return any(self.errors) or bool(self.non_form_errors)
+            self.formplan = None
+        if columnar:
+            self.columnplan = ColumnPlan(self.formplan)
+
+    @property
+    def columnar(self):
+        return self.columnplan is not None
+
+    def __call__(self, list_of_params):
+        if self.columnplan is not None:
+            return _ColumnarSequence(self, list_of_params)
+        if self.executor is not None:
+            return _ParallelSequence(self, list_of_params)
+        if self.formplan is not None:
+            return _FastSequence(self, list_of_params)
+        return _Sequence(self, list_of_params)
+
+    def validate_row(self, params):
+        """(row, errors or None). row is a tuple of values in fast mode, else cleaned_data.
+        the errors of a valid TreeForm item are returned, too (the same shape as in a Sequence, without messages)"""
+        if self.formplan is not None:
+            return self.formplan.clean(params)
+        form = _make_item(self.formclass, params)
+        if form.is_valid() and _is_django_form(form):
+            return form.cleaned_data, None
+        return form.cleaned_data, _plain_errors(form.errors)
+
+    def validate_one(self, params):
+        """(cleaned_data, errors) of one item"""
+        _, cleaned_data, errors = self._validate_one(params)
+        return cleaned_data, errors
+
+    def _validate_one(self, params):
+        # the status is returned as is, errors of a valid TreeForm are not empty ({"name": [], ...})
+        if self.formplan is not None:
+            values, errors = self.formplan.clean(params)
+            return errors is None, self.formplan.as_dict(values), errors or {}
+        form = _make_item(self.formclass, params)
+        valid = form.is_valid()
+        return valid, form.cleaned_data, form.errors
+
+    def iter_validate(self, iterable, reducer=None, initial=None, finalize=None):
+        """validate items lazily (e.g. from an incremental json parser) with bounded memory.
+        the `clean` and `batch_clean` hooks of this sequence are not used, they need all items at once."""
+        return _SequenceStream(self, iterable, reducer=reducer, initial=initial, finalize=finalize)
 
 
 class PartialWrapper(object):
-    def __init__(self, cls, formclass, clean=None):
+    def __init__(self, cls, formclass, clean=None, **options):
         self.cls = cls
         self.formclass = formclass
         self.clean = clean
+        self.options = options
 
     def __call__(self, keyname):
-        return partial(self.cls, self.formclass, keyname, clean=self.clean)
+        return partial(self.cls, _Spec(self.formclass, keyname, clean=self.clean, **self.options))
+
+
+# default cost hints, see _Plan
+_FIELD_COST = 1
+_NODE_COST = 10
+_SEQUENCE_COST = 100
+
+
+class _Plan(object):
+    """compiled validation plan of a TreeForm class.
+
+    only the fields of the class itself are cleaned inline by is_valid(), each node still builds its
+    form (or sequence) per instance. the flat executor of a whole tree, without any node or form per
+    record, is bulk.compile_validator() (used by validate_many()).
+
+    fields: ((keyname, field), ...), cleaned inline by _TreeForm.is_valid()
+    nodes: ((keyname, factory), ...), nested Node/Sequence/TreeForm subtrees
+    factories: all factories in declaration order (base classes first)
+    order: ((keyname, index in nodes or None for a field), ...) in declaration order, the order of
+      the keys of errors and cleaned_data
+    costs: {keyname: cost hint}. with an error budget (fail-fast), cheaper fields are validated
+      first, and cheaper nodes first. fields are always validated before nodes, whatever their costs.
+    """
+    def __init__(self, fields, nodes, factories=(), costs=None, order=None):
+        self.fields = tuple(fields)
+        self.nodes = tuple(nodes)
+        self.factories = tuple(factories)
+        if order is None:
+            order = [(k, None) for k, _ in self.fields] + [(k, i) for i, (k, _) in enumerate(self.nodes)]
+        self.order = tuple(order)
+        self.field_map = dict(self.fields)
+        self.json_schema = _MISSING  # see jsonload.schema_from_shape(), computed on first use
+        self.flat_router = _MISSING  # see flatkeys.router_from_shape(), computed on first use
+        self.pool = None  # see _TreeForm.checkout()
+        self.shape = _MISSING  # see shape.shape_of(), computed on first use
+        self.bulk_validator = None  # see bulk.validator_of()
+        costs = costs or {}
+        # sorted() is stable, declaration order is kept among the same costs
+        self.cheap_fields = tuple(sorted(self.fields, key=lambda kv: costs.get(kv[0], _FIELD_COST)))
+        self.cheap_node_order = tuple(sorted(range(len(self.nodes)),
+                                             key=lambda i: costs.get(self.nodes[i][0], _NODE_COST)))
+
+    @property
+    def keynames(self):
+        return tuple(k for k, _ in self.order)
+
+
+def _declarations(cls):
+    """{keyname: declaration} of cls and its bases, base classes first (like django's declared fields).
+    an inherited declaration can be removed with a plain attribute, e.g. `name = None`"""
+    declared = {}
+    for klass in reversed(cls.__mro__):
+        for k, v in klass.__dict__.items():
+            if isinstance(v, (PartialWrapper, TreeFormMeta, forms.Field)):
+                declared[k] = v  # an overridden declaration keeps the position of the base's one
+            elif k in declared:
+                del declared[k]
+    return declared
+
+
+def compile_plan(cls):
+    fields = []
+    nodes = []
+    factories = []
+    costs = {}
+    order = []
+    for k, v in _declarations(cls).items():
+        if isinstance(v, TreeFormMeta):
+            v = Node(v)
+        elif isinstance(v, forms.Field):
+            v = OneField(v)
+        factory = v(k)
+        factories.append(factory)
+        if v.cls is _OneField:
+            order.append((k, None))
+            fields.append((k, v.formclass))
+            default = _FIELD_COST
+        else:
+            order.append((k, len(nodes)))
+            nodes.append((k, factory))
+            default = _SEQUENCE_COST if isinstance(v.formclass, SequenceWrapper) else _NODE_COST
+        cost = v.options.get("cost")
+        costs[k] = default if cost is None else cost
+    # factories written by hand in class definition (keyname is not known until built)
+    for klass in reversed(cls.__mro__):
+        for factory in klass.__dict__.get("_extra_factories", ()):
+            order.append((None, len(nodes)))
+            nodes.append((None, factory))
+            factories.append(factory)
+    return _Plan(fields, nodes, factories, costs, order)
 
 
 class TreeFormMeta(type):
     def __new__(self, name, bases, attrs):
         cls = super(TreeFormMeta, self).__new__(self, name, bases, attrs)
-        if "factories" not in cls.__dict__:
-            cls.factories = set()
-
-        for k, v in cls.__dict__.items():
-            if isinstance(v, PartialWrapper):
-                cls.factories.add(v(k))
-            elif isinstance(v, TreeFormMeta):
-                cls.factories.add(Node(v)(k))
-            elif isinstance(v, forms.Field):
-                cls.factories.add(OneField(v)(k))
+        if "factories" in attrs:
+            cls._extra_factories = tuple(attrs["factories"])
+        cls.plan = compile_plan(cls)
+        cls.factories = cls.plan.factories
         return cls
 
 
 class _TreeForm(object):
-    def __init__(self, params):
-        self.nodes = [f(params) for f in self.factories]
-        self.non_form_errors = []
+    plan = _Plan((), ())
+    max_errors = None
+    fail_fast = False
+    # limits of the params, checked before any node is built (see limits.scan())
+    max_depth = None
+    max_total_nodes = None
+    pool_size = 8  # free instances kept per thread by checkout()
+    # reject mismatched containers, missing nodes and unexpected keys before any node is built (see shape.py)
+    check_shape = False
+
+    def __init__(self, params, max_errors=None, fail_fast=False, max_depth=None, max_total_nodes=None,
+                 check_shape=None):
+        self.params = params
+        if max_depth is not None:
+            self.max_depth = max_depth
+        if max_total_nodes is not None:
+            self.max_total_nodes = max_total_nodes
+        if check_shape is not None:
+            self.check_shape = check_shape
+        self._nodes = [None] * len(self.plan.nodes)  # built on first use
+        self._spare_nodes = None  # nodes of a pooled instance, rebound on first use
+        if max_errors is not None or fail_fast:
+            self.max_errors = _max_errors(max_errors, fail_fast)
+        else:
+            self.max_errors = _max_errors(self.max_errors, self.fail_fast)
+        self.field_errors = {}  # only invalid (or skipped) fields
+        self.field_cleaned_data = {}
+        self._non_form_errors = None  # allocated on first error
+        self._skipped = None
+        self._shape_errors = None  # [(path, message)], if rejected by the shape check
+        self.n_errors = 0
         self.is_cleaned = False
 
-    def is_valid(self):
+    @property
+    def non_form_errors(self):
+        return self._non_form_errors or []
+
+    @property
+    def shape_errors(self):
+        return self._shape_errors or []
+
+    @property
+    def skipped(self):
+        return self._skipped or []
+
+    def _skip(self, keyname):
+        if self._skipped is None:
+            self._skipped = []
+        self._skipped.append(keyname)
+
+    @classmethod
+    def from_json(cls, source, **kwargs):
+        """build from a JSON document (bytes, str or a file). only the declared keys are decoded,
+        values of unknown keys are skipped without being built. see error_offsets()"""
+        plan = cls.plan
+        if plan.json_schema is _MISSING:
+            plan.json_schema = _schema_from_shape(cls.shape())
+        source = JSONSource.read(source)
+        form = cls(_loads_json(source.text, plan.json_schema), **kwargs)
+        form.source = source
+        return form
+
+    @classmethod
+    def from_querydict(cls, data, style="formset", max_index=MAX_INDEX, **kwargs):
+        """build from the flat keys of an HTML form (e.g. request.POST), routed in one pass.
+        style: "formset" ("points-0-x"), "dotted" ("points.0.x", "points[0].x") or a function splitting a key.
+        an index above max_index is a ValueError. the posted indexes of the items are kept, see posted_path()"""
+        plan = cls.plan
+        if plan.flat_router is _MISSING:
+            plan.flat_router = _router_from_shape(cls.shape())
+        indexes = {}
+        form = cls(_route_flat_keys(data, plan.flat_router, _splitter(style), max_index, indexes), **kwargs)
+        form.posted_indexes = indexes
+        return form
+
+    def posted_path(self, path):
+        """the key path as posted, of a key path of the params (e.g. of an error).
+        items of a sequence are compacted by from_querydict(), "points-3-x" and "points-7-x" are
+        ("points", 0, "x") and ("points", 1, "x") in the params"""
+        indexes = getattr(self, "posted_indexes", None)
+        if not indexes:
+            return tuple(path)
+        return _posted_path(tuple(path), indexes)
+
+    @classmethod
+    def shape(cls):
+        """structural schema of the params of this class, see shape.py"""
+        plan = cls.plan
+        if plan.shape is _MISSING:
+            plan.shape = shape_of(cls)
+        return plan.shape
+
+    @classmethod
+    def json_schema(cls):
+        """the structural schema as JSON Schema. the values of fields are not constrained"""
+        schema = {"$schema": "https://json-schema.org/draft/2020-12/schema", "title": cls.__name__}
+        schema.update(to_json_schema(cls.shape()))
+        return schema
+
+    @classmethod
+    def check_params(cls, params, limit=None):
+        """[(path, message), ...] of the structural errors of params, no form is built"""
+        return _check_shape(params, cls.shape(), limit=limit)
+
+    @classmethod
+    def checkout(cls, params, **kwargs):
+        """a context manager lending a pooled instance bound to params, instead of cls(params, **kwargs).
+        the instance is returned to the pool (of at most pool_size instances per thread) on exit. see pool.py"""
+        plan = cls.plan
+        if plan.pool is None:
+            plan.pool = FormPool(cls, cls.pool_size)
+        return plan.pool.checkout(params, **kwargs)
+
+    def _reset(self, params, **kwargs):
+        """rebind to params, as if built by type(self)(params, **kwargs)"""
+        spare = self._spare_nodes or [None] * len(self._nodes)  # nodes not used since the last reset
+        for i, ((keyname, _), node) in enumerate(zip(self.plan.nodes, self._nodes)):
+            if node is not None:
+                spare[i] = node if keyname is not None and hasattr(node, "_rebound") else None
+        self.__dict__.clear()
+        self.__init__(params, **kwargs)
+        self._spare_nodes = spare
+
+    def _rebound(self, params):
+        self._reset(params)
+        return self
+
+    @classmethod
+    def validate_many(cls, records, executor=None, chunksize=1000):
+        """validate independent records (params of this class) at once, without an instance per record
+        if the class can be compiled (see bulk.py). returns a ValidationResult.
+        with an executor (e.g. ProcessPoolExecutor), chunks of records are validated in its workers"""
+        return _validate_many(cls, records, executor=executor, chunksize=chunksize)
+
+    def error_offsets(self):
+        """[(path, byte offset, messages), ...] of the errors of a form built by from_json()"""
+        source = getattr(self, "source", None)
+        if source is None:
+            raise RuntimeError("not built by from_json()")
+        rows = list(self.error_store.iter_paths())
+        offsets = source.offsets([path for path, _ in rows])
+        return [(path, offsets.get(path), messages) for path, messages in rows]
+
+    @property
+    def nodes(self):
+        return [self._node(i) for i in range(len(self._nodes))]
+
+    def _node(self, i):
+        node = self._nodes[i]
+        if node is None:
+            spare = self._spare_nodes
+            if spare is not None and spare[i] is not None:
+                node, spare[i] = spare[i], None
+                node = self._nodes[i] = node._rebound(self.params)
+            else:
+                node = self._nodes[i] = self.plan.nodes[i][1](self.params)
+        return node
+
+    def is_valid(self, budget=None, tracer=None):
+        """tracer: a Tracer recording the timings of this validation (see also set_tracer())"""
         if self.is_cleaned:
             return not self.has_error()
-        status = all([node.is_valid() for node in self.nodes])
-        self.is_cleaned = True
-        try:
-            self.clean()
-        except forms.ValidationError as e:
-            self.non_form_errors.append(e.args[0])
+        if tracer is None:
+            return self._run(budget, None)
+        with tracing(tracer):
+            return _traced(tracer, None, "form", type(self), self._run, budget, None)
+
+    def validate_paths(self, paths, budget=None):
+        """validate only the subtrees at `paths`, e.g. [("a", "b"), ("title", )].
+        other branches are neither built nor validated, and are left out of errors/cleaned_data.
+        the clean hook of a partially validated TreeForm is not called."""
+        if self.is_cleaned:
+            raise RuntimeError("is_valid() is already called")
+        selected = {}
+        for path in paths:
+            path = tuple(path)
+            if path[0] not in self.plan.keynames:
+                raise KeyError(path)
+            selected.setdefault(path[0], []).append(path[1:])
+        return self._run(budget, selected)
+
+    def _run(self, budget, selected):
+        budget = _Budget.create(self.max_errors, budget)
+        if not self._check_limits(budget):
+            return False
+        if selected is None and not self._check_params(budget):
+            return False
+        status = self._validate_fields(budget, selected)
+        for node, subpaths in self._iter_nodes(budget, selected):
+            if subpaths and all(subpaths) and hasattr(node, "validate_paths"):
+                valid = node.validate_paths(subpaths, budget)
+            else:
+                valid = node.is_valid(budget)
+            if not valid:
+                status = False
+        if not self._validated(budget):
+            return False
+        if selected is not None:
+            return status
+        return _run_clean(self, budget) and status
+
+    async def ais_valid(self, budget=None, semaphore=None, concurrency=None, tracer=None):
+        """is_valid() for async clean hooks (`async def clean(self)` or `Node(..., clean=coroutine function)`).
+        sibling subtrees are validated concurrently, at most `concurrency` async hooks run at once"""
+        if self.is_cleaned:
+            return not self.has_error()
+        semaphore = _semaphore(semaphore, concurrency)
+        if tracer is None:
+            return await self._arun(budget, semaphore)
+        with tracing(tracer):
+            state = tracer.enter()
+            try:
+                return await self._arun(budget, semaphore)
+            finally:
+                tracer.leave(state, "form", type(self))
+
+    async def _arun(self, budget, semaphore):
+        budget = _Budget.create(self.max_errors, budget)
+        if not self._check_limits(budget) or not self._check_params(budget):
+            return False
+        status = self._validate_fields(budget, None)
+        nodes = (node for node, _ in self._iter_nodes(budget, None))
+        if not await _avalidate_each(nodes, budget, semaphore):
             status = False
+        if not self._validated(budget):
+            return False
+        return (await _arun_clean(self, budget, semaphore)) and status
+
+    def _check_limits(self, budget):
+        if self.max_depth is None and self.max_total_nodes is None:
+            return True
+        message = _scan_limits(self.params, self.max_depth, self.max_total_nodes)
+        return message is None or _reject(self, message, budget)
+
+    def _check_params(self, budget):
+        if not self.check_shape:
+            return True
+        problems = _check_shape(self.params, self.shape(), limit=self.max_errors)
+        if not problems:
+            return True
+        # nothing is built or validated, the errors are kept by key path
+        self._shape_errors = problems
+        self.n_errors += len(problems)
+        self.is_cleaned = True
+        if budget is not None:
+            budget.spend(len(problems))
+        return False
+
+    def _validate_fields(self, budget, selected):
+        status = True
+        params = self.params
+        field_errors = self.field_errors
+        field_cleaned_data = self.field_cleaned_data
+        tracer = current_tracer()
+        for keyname, field in (self.plan.fields if budget is None else self.plan.cheap_fields):
+            if selected is not None and keyname not in selected:
+                continue
+            if budget is not None and budget.exhausted:
+                field_cleaned_data[keyname] = field_errors[keyname] = None
+                self._skip(keyname)
+                continue
+            try:
+                if tracer is None:
+                    field_cleaned_data[keyname] = field.clean(params.get(keyname))
+                else:
+                    field_cleaned_data[keyname] = _traced(tracer, keyname, "field", field, field.clean,
+                                                          params.get(keyname))
+            except forms.ValidationError as e:
+                field_cleaned_data[keyname] = None
+                field_errors[keyname] = [e.args[0]]
+                status = False
+                if budget is not None:
+                    budget.spend()
         return status
 
+    def _iter_nodes(self, budget, selected):
+        # (node, subpaths), nodes are built on demand
+        plan = self.plan
+        for i in (range(len(plan.nodes)) if budget is None else plan.cheap_node_order):
+            keyname = plan.nodes[i][0]
+            if selected is not None and keyname not in selected:
+                continue
+            if budget is not None and budget.exhausted:
+                self._skip(keyname)
+                continue
+            yield self._node(i), (selected and selected[keyname])
+
+    def _validated(self, budget):
+        self.is_cleaned = True
+        self.n_errors = self._sum_errors()
+        return budget is None or not budget.exhausted
+
+    def _sum_errors(self):
+        n = len(self._skipped or ()) + len(self._non_form_errors or ())
+        for errors in self.field_errors.values():
+            if errors:
+                n += 1
+        for node in self._nodes:
+            if node is not None and node.is_cleaned:
+                n += node.n_errors
+        return n
+
     def clean(self):
         pass
 
+    def _has_clean(self):
+        return type(self).clean is not _TreeForm.clean
+
+    def add_error(self, field, message):
+        """attach an error after validation, like django's Form.add_error() (field=None for a non field error)"""
+        if field is None:
+            self._add_non_form_error(message)
+            return
+        elif field in self.plan.field_map:
+            errors = self.field_errors.get(field) or []
+            if not errors:
+                self.n_errors += 1
+            self.field_errors[field] = list(errors) + [message]
+            self.field_cleaned_data[field] = None
+        else:
+            raise ValueError("{!r} has no field named {!r}".format(self.__class__.__name__, field))
+        _clear_cache(self)
+
+    def _add_non_form_error(self, message):
+        if self._non_form_errors is None:
+            self._non_form_errors = []
+        self._non_form_errors.append(message)
+        self.n_errors += 1
+        _clear_cache(self)
+
+    def _clean_field(self, keyname, field):
+        try:
+            self.field_cleaned_data[keyname] = field.clean(self.params.get(keyname))
+            self.field_errors.pop(keyname, None)
+        except forms.ValidationError as e:
+            self.field_cleaned_data[keyname] = None
+            self.field_errors[keyname] = [e.args[0]]
+
+    def patch(self, path, value):
+        """replace the value at path (e.g. ("a", "items", 3, "name")) and re-validate only
+        the affected field or leaf form, and the clean hooks of its ancestors.
+        subtrees skipped by fail-fast validation are validated here, too."""
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        fields = self.plan.field_map
+        for keyname, field in self.plan.fields:
+            if keyname in self.skipped or keyname not in self.field_cleaned_data:
+                self._clean_field(keyname, field)
+        for node in self.nodes:
+            if not node.is_cleaned:
+                node.is_valid()
+        self._skipped = None
+
+        keyname, rest = path[0], tuple(path[1:])
+        if keyname in fields:
+            if rest:
+                raise KeyError(path)
+            self.params = self.params.copy()
+            self.params[keyname] = value
+            self._clean_field(keyname, fields[keyname])
+        else:
+            for i, node in enumerate(self._nodes):
+                if node.keyname == keyname:
+                    break
+            else:
+                raise KeyError(path)
+            if rest:
+                node.patch(rest, value)
+            else:
+                self.params = self.params.copy()
+                self.params[keyname] = value
+                node = self._nodes[i] = self.plan.nodes[i][1](self.params)
+                node.is_valid()
+        _clear_cache(self)
+        self._non_form_errors = None
+        self.n_errors = self._sum_errors()
+        _run_clean(self)
+        return not self.has_error()
+
     @cached_property
     def errors(self):
         if not self.is_cleaned:
             raise RuntimeError("is_valid() is not called")
+        field_errors = self.field_errors
+        validated = self.field_cleaned_data
+        nodes = self._nodes
         errors = {}
-        for node in self.nodes:
-            errors.update({node.keyname: node.errors})
-        if bool(self.non_form_errors):
+        for keyname, i in self.plan.order:
+            if i is None:
+                if keyname in validated:
+                    errors[keyname] = field_errors.get(keyname, [])
+            elif nodes[i] is not None and nodes[i].is_cleaned:
+                errors[nodes[i].keyname] = nodes[i].errors
+            elif keyname in self.skipped:
+                errors[keyname] = None
+        if self._non_form_errors:
             if "__all__" not in errors:
                 errors["__all__"] = []
-            errors["__all__"].extend(self.non_form_errors)
+            errors["__all__"].extend(self._non_form_errors)
+        if self._shape_errors:
+            errors.setdefault("__all__", []).extend(
+                "{}: {}".format(format_path(path), message) for path, message in self._shape_errors
+            )
         return errors
 
+    def save_bulk(self, batch_size=None, using=None):
+        """create the model instances of the bound nodes and sequences (declared with model=) with
+        bulk_create, level by level in one transaction. returns the instances of the top level"""
+        return _save_bulk(self, batch_size=batch_size, using=using)
+
+    @cached_property
+    def error_store(self):
+        """errors by key path, e.g. error_store.at(("points", 4123, "x")).
+        valid subtrees are not visited, and the nested shape (errors) is not built"""
+        if not self.is_cleaned:
+            raise RuntimeError("is_valid() is not called")
+        return ErrorStore.of(self)
+
+    def _collect_errors(self, prefix, into):
+        for keyname, messages in self.field_errors.items():
+            if messages:
+                into[prefix + (keyname, )] = messages
+        for node in self._nodes:
+            if node is not None and node.is_cleaned and node.n_errors:
+                _collect_errors(node, prefix + (node.keyname, ), into)  # hand-written nodes may not have the hook
+        if self._non_form_errors:
+            _add_errors(into, prefix, self._non_form_errors)
+        for path, message in self.shape_errors:
+            _add_errors(into, prefix + path, [message])
+
     @cached_property
     def cleaned_data(self):
         if not self.is_cleaned:
             raise RuntimeError("is_valid() is not called")
+        validated = self.field_cleaned_data
+        nodes = self._nodes
         cleaned_data = {}
-        for node in self.nodes:
-            cleaned_data.update({node.keyname: node.cleaned_data})
+        for keyname, i in self.plan.order:
+            if i is None:
+                if keyname in validated:
+                    cleaned_data[keyname] = validated[keyname]
+            elif nodes[i] is not None and nodes[i].is_cleaned:
+                cleaned_data[nodes[i].keyname] = nodes[i].cleaned_data
+            elif keyname in self.skipped:
+                cleaned_data[keyname] = None
         return cleaned_data
 
     def has_error(self):
-        return any(node.has_error() for node in self.nodes)
+        return self.n_errors > 0
 
 
 TreeForm = TreeFormMeta("TreeForm", (_TreeForm, ), {})
 
 
-def Sequence(formclass, clean=None):
-    return partial(_Sequence, formclass, clean=clean)
+def Sequence(formclass, clean=None, fast=False, max_errors=None, fail_fast=False, executor=None, chunksize=1000,
+             cache=None, batch_clean=None, columnar=False, max_items=None, model=None, fk=None):
+    """batch_clean(batch) is called once with all validated items (e.g. for one bulk query),
+    batch.add_error(index, field, message) attaches errors back to the items.
+    columnar: cleaned_data is {field name: column} (array.array for numbers), see columnar.py
+    max_items: longer lists are rejected (a non form error) before any item is built
+    model, fk: each item is saved as a model instance by save_bulk(), see persist.py"""
+    return SequenceWrapper(formclass, clean=clean, fast=fast, max_errors=max_errors, fail_fast=fail_fast,
+                           executor=executor, chunksize=chunksize, cache=cache, batch_clean=batch_clean,
+                           columnar=columnar, max_items=max_items, model=model, fk=fk)
 
 
-def Node(formclass, clean=None):
-    return PartialWrapper(_Node, formclass, clean=clean)
+def Node(formclass, clean=None, max_errors=None, fail_fast=False, cache=None, cost=None, model=None, fk=None):
+    """cost: hint of the validation cost, cheaper subtrees are validated first under fail-fast
+    model, fk: the node is saved as a model instance by save_bulk(), see persist.py"""
+    return PartialWrapper(_Node, formclass, clean=clean, max_errors=max_errors, fail_fast=fail_fast,
+                          cache=cache, cost=cost, model=model, fk=fk)
 
 
-def OneField(formclass, clean=None):
-    return PartialWrapper(_OneField, formclass, clean=clean)
+def OneField(formclass, clean=None, cost=None):
+    """cost: hint of the validation cost, cheaper fields are validated first under fail-fast.
+    fields are validated before nodes whatever their costs"""
+    return PartialWrapper(_OneField, formclass, clean=clean, cost=cost)
 
 
-def SequenceNode(formclass):
-    return Node(Sequence(formclass))
+def SequenceNode(formclass, cost=None, **kwargs):
+    return Node(Sequence(formclass, **kwargs), cost=cost)
 
 
 '''
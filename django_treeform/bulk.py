@@ -0,0 +1,201 @@
+# -*- coding:utf-8 -*-
+"""
+validating many independent records of the same class.
+
+a class without hooks (clean, batch_clean, error budgets, caches) is compiled once into
+plain closures: TreeForm fields are cleaned inline, django Forms with the shared field
+instances (see _FormPlan), so no node or form is instantiated per record. the others fall
+back to one instance per record.
+"""
+from collections.abc import Mapping
+from functools import partial
+from django import forms
+from .shape import EXPECTED_OBJECT
+
+
+def _prefixed(prefix, errors, into):
+    for path, messages in errors.items():
+        into[prefix + path] = messages
+
+
+def compile_validator(formclass):
+    """validator(params) -> (cleaned_data, None or {path: messages}), or None if not compilable"""
+    from . import TreeFormMeta, SequenceWrapper, _FormPlan, _TreeForm, _Node
+    if isinstance(formclass, SequenceWrapper):
+        wrapper = formclass
+        if (wrapper.clean is not None or wrapper.batch_clean is not None or wrapper.max_errors is not None
+                or wrapper.executor is not None or wrapper.columnar or wrapper.max_items is not None):
+            return None
+        item = compile_validator(wrapper.formclass)
+        if item is None:
+            return None
+
+        def validate_sequence(list_of_params):
+            rows = []
+            errors = None
+            for i, params in enumerate(list_of_params):
+                if not isinstance(params, Mapping):  # e.g. null, same as _NotAnObject
+                    row, row_errors = {}, {(): [EXPECTED_OBJECT]}
+                else:
+                    row, row_errors = item(params)
+                rows.append(row)
+                if row_errors is not None:
+                    if errors is None:
+                        errors = {}
+                    _prefixed((i, ), row_errors, errors)
+            return rows, errors
+        return validate_sequence
+
+    if isinstance(formclass, TreeFormMeta):
+        plan = formclass.plan
+        if formclass.clean is not _TreeForm.clean or formclass.max_errors is not None or formclass.fail_fast:
+            return None
+        if formclass.__init__ is not _TreeForm.__init__:
+            return None
+        if formclass.max_depth is not None or formclass.max_total_nodes is not None or formclass.check_shape:
+            return None
+        fields = tuple((keyname, field.clean) for keyname, field in plan.fields)
+        nodes = []
+        for keyname, factory in plan.nodes:
+            if keyname is None or not isinstance(factory, partial) or factory.func is not _Node:
+                return None  # hand-written factories
+            spec = factory.args[0]
+            if spec.clean is not None or spec.max_errors is not None or spec.cache is not None:
+                return None
+            validator = compile_validator(spec.formclass)
+            if validator is None:
+                return None
+            nodes.append((keyname, (keyname, ), validator))
+        nodes = tuple(nodes)
+        ValidationError = forms.ValidationError
+
+        def validate_tree(params):
+            cleaned_data = {}
+            errors = None
+            for keyname, clean in fields:
+                try:
+                    cleaned_data[keyname] = clean(params.get(keyname))
+                except ValidationError as e:
+                    cleaned_data[keyname] = None
+                    if errors is None:
+                        errors = {}
+                    errors[(keyname, )] = [e.args[0]]
+            for keyname, prefix, validator in nodes:
+                cleaned_data[keyname], node_errors = validator(params[keyname])
+                if node_errors is not None:
+                    if errors is None:
+                        errors = {}
+                    _prefixed(prefix, node_errors, errors)
+            return cleaned_data, errors
+        return validate_tree
+
+    if _FormPlan.is_available(formclass):
+        formplan = _FormPlan(formclass)
+        clean = formplan.clean
+        as_dict = formplan.as_dict
+
+        def validate_form(params):
+            values, errors = clean(params)
+            if errors is None:
+                return as_dict(values), None
+            return as_dict(values), {
+                () if name == "__all__" else (name, ): messages for name, messages in errors.items()
+            }
+        return validate_form
+    return None
+
+
+def _validate_instance(formclass, params):
+    from . import iter_error_paths
+    form = formclass(params)
+    if form.is_valid():
+        return form.cleaned_data, None
+    store = getattr(form, "error_store", None)
+    if store is None:  # a django Form
+        return form.cleaned_data, dict(iter_error_paths(form.errors))
+    return form.cleaned_data, store.paths
+
+
+def validator_of(formclass):
+    """the compiled validator of formclass (a TreeForm class is compiled once), or the fallback"""
+    plan = getattr(formclass, "plan", None)
+    validator = None if plan is None else plan.bulk_validator
+    if validator is None:
+        validator = compile_validator(formclass)
+        if validator is None:
+            validator = partial(_validate_instance, formclass)
+        if plan is not None:
+            plan.bulk_validator = validator
+    return validator
+
+
+def _validate_chunk(formclass, records):
+    # runs in worker processes
+    return _validate_records(validator_of(formclass), records)
+
+
+def _validate_records(validator, records):
+    valid = bytearray()
+    cleaned_data = []
+    errors = {}
+    for i, params in enumerate(records):
+        row, row_errors = validator(params)
+        cleaned_data.append(row)
+        if row_errors is None:
+            valid.append(1)
+        else:
+            valid.append(0)
+            errors[i] = row_errors
+    return ValidationResult(valid, cleaned_data, errors)
+
+
+class ValidationResult(object):
+    """result of validate_many().
+
+    valid: bytearray, 1 for each valid record
+    cleaned_data: cleaned data of each record (partial if invalid)
+    errors: {record index: {path: messages}}, only for invalid records
+    """
+    __slots__ = ("valid", "cleaned_data", "errors")
+
+    def __init__(self, valid, cleaned_data, errors):
+        self.valid = valid
+        self.cleaned_data = cleaned_data
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.valid)
+
+    @property
+    def n_invalid(self):
+        return len(self.errors)
+
+    def is_valid(self):
+        return not self.errors
+
+    def valid_rows(self):
+        return [row for ok, row in zip(self.valid, self.cleaned_data) if ok]
+
+    def extend(self, other):
+        offset = len(self.valid)
+        self.valid.extend(other.valid)
+        self.cleaned_data.extend(other.cleaned_data)
+        for i, errors in other.errors.items():
+            self.errors[offset + i] = errors
+
+
+def validate_many(formclass, records, executor=None, chunksize=1000):
+    if executor is None:
+        return _validate_records(validator_of(formclass), records)
+    if not isinstance(records, (list, tuple)):
+        records = list(records)
+    futures = [executor.submit(_validate_chunk, formclass, records[i:i + chunksize])
+               for i in range(0, len(records), chunksize)]
+    result = ValidationResult(bytearray(), [], {})
+    try:
+        for future in futures:
+            result.extend(future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+    return result
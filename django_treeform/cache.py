@@ -0,0 +1,92 @@
+# -*- coding:utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+
+
+def freeze(ob):
+    """hashable and canonical representation of params (None if it cannot be made)"""
+    if type(ob) is dict:
+        try:
+            items = sorted(ob.items())
+        except TypeError:
+            return None
+        frozen = []
+        for k, v in items:
+            v = freeze(v)
+            if v is None:
+                return None
+            frozen.append((k, v))
+        return (dict, tuple(frozen))
+    elif type(ob) in (list, tuple):
+        frozen = []
+        for v in ob:
+            v = freeze(v)
+            if v is None:
+                return None
+            frozen.append(v)
+        return (list, tuple(frozen))
+    try:
+        hash(ob)
+    except TypeError:
+        return None
+    # type is included, 1 and True and "1" are cleaned differently
+    return (type(ob), ob)
+
+
+class ValidationCache(object):
+    """bounded LRU cache of validation results, optionally expired after `ttl` seconds.
+
+    only forms declaring `pure_validation = True` are cached, i.e. the result must depend
+    on nothing but the params (no request, no database).
+    """
+    def __init__(self, maxsize=1024, ttl=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.store = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, formclass, params):
+        frozen = freeze(params)
+        if frozen is None:
+            return None
+        return (formclass, frozen)
+
+    def get(self, key):
+        with self.lock:
+            try:
+                expires, value = self.store[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if expires is not None and expires <= self.timer():
+                del self.store[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self.store.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else self.timer() + self.ttl
+        with self.lock:
+            self.store[key] = (expires, value)
+            self.store.move_to_end(key)
+            while len(self.store) > self.maxsize:
+                self.store.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.store.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self.store)}
+
+    def __len__(self):
+        return len(self.store)
@@ -0,0 +1,317 @@
+# -*- coding:utf-8 -*-
+"""
+validating big NDJSON / JSON array files.
+
+    $ python -m django_treeform validate myapp.forms:PersonForm dump.ndjson --output errors.tsv
+
+the file is memory-mapped and split on record boundaries into chunks (--chunk-size bytes),
+validated by a process pool (--workers). at most 2 chunks per worker are in flight, so the
+memory use does not depend on the size of the file. the report has one line per error,
+"<line>\\t<key path>\\t<message>", the stats are written to stderr.
+"""
+import argparse
+import collections
+import importlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .trace import format_path
+
+_WS = re.compile(rb"[ \t\n\r]*")
+_STRINGS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# anything, strings are matched whole (so a match ends outside of strings)
+_SPAN = re.compile(rb'[^"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"]*)*', re.S)
+# up to the next bracket or comma outside of strings
+_NEXT = re.compile(rb'[^"\[\]\{\},]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]\{\},]*)*', re.S)
+_OPEN = frozenset(b"[{")
+
+_formclasses = {}  # per process
+
+
+def setup_django():
+    import django
+    from django.conf import settings
+    if not settings.configured and not os.environ.get("DJANGO_SETTINGS_MODULE"):
+        settings.configure()
+    django.setup()
+
+
+def resolve(spec):
+    """the TreeForm, Sequence or Form named by "module:attr" (attr may be dotted)"""
+    formclass = _formclasses.get(spec)
+    if formclass is None:
+        module_name, sep, attr = spec.partition(":")
+        if not sep or not attr:
+            raise ValueError("expected 'module:attr', got {!r}".format(spec))
+        formclass = importlib.import_module(module_name)
+        for name in attr.split("."):
+            formclass = getattr(formclass, name)
+        _formclasses[spec] = formclass
+    return formclass
+
+
+def ndjson_chunks(buf, chunk_size):
+    """(start, end) spans of whole lines, about chunk_size bytes each"""
+    start = 0
+    size = len(buf)
+    while start < size:
+        end = buf.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end < 0 else end + 1
+        yield start, end
+        start = end
+
+
+def _scan(buf, start, end):
+    """(pos, depth change over [start, pos)), pos <= end is the last position outside of strings"""
+    text = buf[start:end]
+    if b"\\" in text:
+        pos = _SPAN.match(buf, start, end).end()
+        outside = _STRINGS.sub(b"", text[:pos - start])
+    else:  # no escapes: the strings are between the quotes (fast path)
+        parts = text.split(b'"')
+        pos = end
+        if len(parts) % 2 == 0:  # end is in a string
+            pos -= len(parts.pop()) + 1
+        outside = b"".join(parts[0::2])
+    return pos, outside.count(b"[") + outside.count(b"{") - outside.count(b"]") - outside.count(b"}")
+
+
+def array_chunks(buf, chunk_size):
+    """(start, end) spans of whole items of the top level array, about chunk_size bytes each.
+    spans are contiguous, the separating commas are left at the head of the next span.
+    the bytes up to the split point are scanned in bulk, only the item at the split point
+    is walked bracket by bracket"""
+    pos = _WS.match(buf, 0).end()
+    if pos >= len(buf) or buf[pos] != 0x5b:  # '['
+        raise ValueError("not a JSON array")
+    size = len(buf)
+    start = pos + 1
+    while start + chunk_size < size:
+        pos, depth = _scan(buf, start, start + chunk_size)
+        depth += 1
+        while True:  # to the next comma of the top level array, or its end
+            pos = _NEXT.match(buf, pos).end()
+            if pos >= size:
+                raise ValueError("unterminated array")
+            c = buf[pos]
+            if c == 0x2c:  # ','
+                if depth == 1:
+                    break
+            elif c in _OPEN:
+                depth += 1
+            elif c == 0x22:  # '"'
+                raise ValueError("unterminated string at byte {}".format(pos))
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+            pos += 1
+        if depth == 0:
+            yield start, pos
+            return
+        yield start, pos
+        start = pos
+    end = buf.rfind(b"]")
+    if end < start - 1:
+        raise ValueError("unterminated array")
+    if end > start:
+        yield start, end
+
+
+def _iter_ndjson(text):
+    """(line in text, params, None) or (line, None, error message) of each non empty line"""
+    for lineno, line in enumerate(text.split("\n")):
+        if not line.strip():
+            continue
+        try:
+            yield lineno, json.loads(line), None
+        except ValueError as e:
+            yield lineno, None, "Invalid JSON: {}".format(e)
+
+
+def _iter_array(text):
+    """same as _iter_ndjson(), for a span of array items separated by commas"""
+    decoder = json.JSONDecoder()
+    size = len(text)
+    pos = lineno = counted = 0
+    while True:
+        while pos < size and text[pos] in " \t\n\r,":
+            pos += 1
+        if pos >= size:
+            return
+        lineno += text.count("\n", counted, pos)
+        counted = pos
+        try:
+            params, pos = decoder.raw_decode(text, pos)
+        except ValueError as e:
+            yield lineno, None, "Invalid JSON: {}".format(e)
+            return
+        yield lineno, params, None
+
+
+def _shape_of(formclass):
+    from .shape import shape_of
+    shape = getattr(formclass, "shape", None)  # cached on the plan of a TreeForm class
+    return shape() if callable(shape) else shape_of(formclass)
+
+
+def _check_record(params, shape):
+    """[(key path, [message])] of the mismatched containers and missing nodes of params.
+    unexpected keys are left to the validator (forms ignore them)"""
+    from .shape import check, UNEXPECTED
+    return [(p, [message]) for p, message in check(params, shape) if message != UNEXPECTED]
+
+
+def validate_chunk(spec, path, start, end, kind):
+    """(n_records, n_invalid, n_lines, [(line in chunk, key path, messages)]) of the records in [start, end).
+    a record of the wrong shape (e.g. a list instead of an object, a missing node) is reported as such,
+    it doesn't stop the run"""
+    from .bulk import validator_of
+    formclass = resolve(spec)
+    validator = validator_of(formclass)
+    shape = _shape_of(formclass)
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            text = buf[start:end].decode("utf-8")
+        finally:
+            buf.close()
+    records = _iter_ndjson(text) if kind == "ndjson" else _iter_array(text)
+    n = n_invalid = 0
+    errors = []
+    for lineno, params, message in records:
+        n += 1
+        if message is not None:
+            n_invalid += 1
+            errors.append((lineno, (), [message]))
+            continue
+        row_errors = _check_record(params, shape)
+        if row_errors:
+            n_invalid += 1
+            errors.extend((lineno, p, messages) for p, messages in row_errors)
+            continue
+        try:
+            _, row_errors = validator(params)
+        except (KeyError, TypeError, AttributeError) as e:  # e.g. read by a hand-written factory
+            n_invalid += 1
+            errors.append((lineno, (), ["Invalid record: {!r}".format(e)]))
+            continue
+        if row_errors:
+            n_invalid += 1
+            errors.extend((lineno, p, list(messages)) for p, messages in row_errors.items())
+    return n, n_invalid, text.count("\n"), errors
+
+
+class _InProcess(object):
+    """executor running everything in this process (--workers 0)"""
+    class _Done(object):
+        def __init__(self, value):
+            self.value = value
+
+        def result(self):
+            return self.value
+
+    def submit(self, fn, *args):
+        return self._Done(fn(*args))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Report(object):
+    """writes the results of the chunks in file order, and counts the lines before each chunk"""
+    def __init__(self, buf, output, stats):
+        self.buf = buf
+        self.output = output
+        self.stats = stats
+        self.line = 0
+        self.pos = 0
+
+    def add(self, start, end, result):
+        n, n_invalid, n_lines, errors = result
+        self.line += self.buf[self.pos:start].count(b"\n")  # e.g. the "[" of an array
+        self.stats["records"] += n
+        self.stats["invalid"] += n_invalid
+        write = self.output.write
+        for lineno, path, messages in errors:
+            for message in messages:
+                write("{}\t{}\t{}\n".format(self.line + lineno + 1, format_path(path), message))
+        self.line += n_lines
+        self.pos = end
+
+
+def validate_file(spec, path, output, chunk_size=4 << 20, workers=None, kind="auto"):
+    """validate every record of the file at path, and write the errors to output.
+    returns the stats {"records", "invalid", "bytes", "seconds"}"""
+    started = time.perf_counter()
+    resolve(spec)  # fail early, before any worker is started
+    stats = {"records": 0, "invalid": 0, "bytes": os.path.getsize(path)}
+    if stats["bytes"] == 0:
+        stats["seconds"] = time.perf_counter() - started
+        return stats
+    if workers is None:
+        workers = os.cpu_count() or 1
+    executor = _InProcess() if workers == 0 else ProcessPoolExecutor(workers, initializer=setup_django)
+    with open(path, "rb") as f, executor:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if kind == "auto":
+                pos = _WS.match(buf, 0).end()
+                kind = "array" if pos < len(buf) and buf[pos] == 0x5b else "ndjson"
+            chunks = ndjson_chunks(buf, chunk_size) if kind == "ndjson" else array_chunks(buf, chunk_size)
+            report = _Report(buf, output, stats)
+            pending = collections.deque()
+            for start, end in chunks:
+                pending.append((start, end, executor.submit(validate_chunk, spec, path, start, end, kind)))
+                if len(pending) >= max(workers, 1) * 2:  # bounded memory: few chunks in flight
+                    start, end, future = pending.popleft()
+                    report.add(start, end, future.result())
+            while pending:
+                start, end, future = pending.popleft()
+                report.add(start, end, future.result())
+        finally:
+            buf.close()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def format_stats(stats):
+    seconds = max(stats["seconds"], 1e-9)
+    return "records={} invalid={} bytes={} seconds={:.3f} records/s={:.0f} MB/s={:.2f}".format(
+        stats["records"], stats["invalid"], stats["bytes"], stats["seconds"],
+        stats["records"] / seconds, stats["bytes"] / seconds / 1e6,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m django_treeform")
+    subparsers = parser.add_subparsers(dest="command")
+    validate = subparsers.add_parser("validate", help="validate each record of a NDJSON or JSON array file")
+    validate.add_argument("formclass", help="module:attr of a TreeForm, a Sequence or a django Form")
+    validate.add_argument("path")
+    validate.add_argument("--format", choices=["auto", "ndjson", "array"], default="auto")
+    validate.add_argument("--workers", type=int, default=None, help="processes (default: cpu count, 0: no pool)")
+    validate.add_argument("--chunk-size", type=int, default=4 << 20, help="bytes per chunk")
+    validate.add_argument("--output", default="-", help="error report (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.command != "validate":
+        parser.print_help()
+        return 2
+
+    setup_django()
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        stats = validate_file(args.formclass, args.path, output, chunk_size=args.chunk_size,
+                              workers=args.workers, kind=args.format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    sys.stderr.write(format_stats(stats) + "\n")
+    return 1 if stats["invalid"] else 0
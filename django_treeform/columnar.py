@@ -0,0 +1,160 @@
+# -*- coding:utf-8 -*-
+"""
+column-oriented validation of a sequence of a plain django Form.
+
+each field is validated as a whole column. columns of required IntegerField/FloatField are
+array.array ("q"/"d"), converted at once when every cell is a plain number or a string
+(cells are cleaned one by one only if that fails), the other columns are lists. invalid
+cells are 0 in arrays and None in lists, see the masks.
+"""
+import math
+from array import array
+from django import forms
+from django.core import validators
+
+try:
+    import numpy
+except ImportError:  # optional, only for to_numpy()
+    numpy = None
+
+_INTEGER_TYPES = frozenset([str, int])
+_FLOAT_TYPES = frozenset([str, int, float])
+
+
+def _bounds(field):
+    """(min, max) of the value validators of field, or None if it has other validators"""
+    lo = hi = None
+    for validator in field.validators:
+        if type(validator) not in (validators.MinValueValidator, validators.MaxValueValidator):
+            return None
+        limit = validator.limit_value
+        if callable(limit):
+            return None
+        if type(validator) is validators.MinValueValidator:
+            lo = limit if lo is None else max(lo, limit)
+        else:
+            hi = limit if hi is None else min(hi, limit)
+    return lo, hi
+
+
+def _in_bounds(column, bounds):
+    lo, hi = bounds
+    if not column:
+        return True
+    return (lo is None or min(column) >= lo) and (hi is None or max(column) <= hi)
+
+
+def _integer_column(values, bounds):
+    if not _INTEGER_TYPES.issuperset(map(type, values)):
+        return None
+    try:
+        # int() accepts exactly what IntegerField accepts without a trailing ".0"
+        column = array("q", map(int, values))
+    except (ValueError, OverflowError):
+        return None
+    return column if _in_bounds(column, bounds) else None
+
+
+def _float_column(values, bounds):
+    if not _FLOAT_TYPES.issuperset(map(type, values)):
+        return None
+    try:
+        column = array("d", map(float, values))
+    except (ValueError, OverflowError):
+        return None
+    if not math.isfinite(sum(column)):  # nan, inf (or an overflowing sum, checked per cell)
+        return None
+    return column if _in_bounds(column, bounds) else None
+
+
+def _column_type(field):
+    """(typecode, convert, bounds) of the column of field, convert is None without a fast path"""
+    if not field.required or field.localize or type(field) not in (forms.IntegerField, forms.FloatField):
+        return None, None, None
+    typecode = "q" if type(field) is forms.IntegerField else "d"
+    bounds = _bounds(field)
+    if bounds is None:
+        return typecode, None, None
+    return typecode, (_integer_column if typecode == "q" else _float_column), bounds
+
+
+def _put(columns, name, i, value):
+    column = columns[name]
+    try:
+        column[i] = value
+    except OverflowError:  # out of the range of the array
+        column = columns[name] = list(column)
+        column[i] = value
+
+
+class ColumnPlan(object):
+    """columns of the fields of a _FormPlan"""
+    def __init__(self, formplan):
+        self.formplan = formplan
+        self.columns = tuple((name, field, getvalue) + _column_type(field)
+                             for name, field, getvalue in formplan.fields)
+
+    def clean_column(self, i, list_of_params, row_errors):
+        """(column, mask) of the i-th field. errors are added to row_errors ({row: {name: messages}})"""
+        name, field, getvalue, typecode, convert, bounds = self.columns[i]
+        if getvalue is None:
+            values = [params.get(name) for params in list_of_params]
+        else:
+            values = [getvalue(params, {}, name) for params in list_of_params]
+        if convert is not None:
+            column = convert(values, bounds)
+            if column is not None:
+                return column, bytearray(b"\x01") * len(values)
+        column = [] if typecode is None else array(typecode)
+        fill = None if typecode is None else 0
+        mask = bytearray(len(values))
+        clean = field.clean
+        for j, value in enumerate(values):
+            try:
+                value = clean(value)
+            except forms.ValidationError as e:
+                value = fill
+                errors = row_errors.get(j)
+                if errors is None:
+                    errors = row_errors[j] = {}
+                errors[name] = e.messages
+            else:
+                mask[j] = 1
+            try:
+                column.append(value)
+            except OverflowError:
+                column = list(column)
+                column.append(value)
+        return column, mask
+
+    def put_row(self, columns, masks, i, values, errors):
+        """store a row cleaned by the _FormPlan, fields in errors are invalid"""
+        for (name, _, _, _, _, _), value in zip(self.columns, values):
+            if errors is not None and name in errors:
+                self.invalidate(columns, masks, i, name)
+            else:
+                _put(columns, name, i, value)
+                masks[name][i] = 1
+
+    def invalidate(self, columns, masks, i, name):
+        if name not in self.formplan.index:
+            raise ValueError("{!r} has no field named {!r}".format(self.formplan.formclass.__name__, name))
+        _put(columns, name, i, None if type(columns[name]) is list else 0)
+        masks[name][i] = 0
+
+    def row(self, columns, masks, i):
+        """cleaned_data of the i-th row"""
+        return {name: column[i] for name, column in columns.items() if masks[name][i]}
+
+
+def to_numpy(columns):
+    """{name: numpy array}, arrays are int64/float64, lists are object arrays"""
+    if numpy is None:
+        raise ImportError("numpy is required for to_numpy()")
+    result = {}
+    for name, column in columns.items():
+        if isinstance(column, array):
+            result[name] = numpy.frombuffer(column, dtype=column.typecode).copy()
+        else:
+            result[name] = numpy.array(column, dtype=object)
+    return result
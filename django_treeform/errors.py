@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+"""
+errors of a validated tree, keyed by key path.
+
+a path is a tuple of keys and sequence indexes, e.g. ("points", 4123, "x"). errors of a form
+or a sequence itself (its non field errors, "__all__" in the nested shape) are kept at the
+path of that form. only the invalid paths are stored, and the message lists are shared with
+the validated tree (not copied).
+"""
+from .jsonload import iter_error_paths
+
+
+def add(into, path, messages):
+    current = into.get(path)
+    into[path] = messages if current is None else list(current) + list(messages)
+
+
+def collect(ob, prefix, into):
+    """add the errors of a validated ob (a node, a sequence or a django form) under prefix"""
+    method = getattr(ob, "_collect_errors", None)
+    if method is not None:
+        return method(prefix, into)
+    for path, messages in iter_error_paths(ob.errors, prefix):
+        add(into, path, messages)
+
+
+class ErrorStore(object):
+    """{path: messages} of a validated tree. `nested` is the usual nested shape (form.errors)"""
+    __slots__ = ("paths", "owner")
+
+    def __init__(self, paths, owner=None):
+        self.paths = paths
+        self.owner = owner
+
+    @classmethod
+    def of(cls, ob):
+        paths = {}
+        collect(ob, (), paths)
+        return cls(paths, ob)
+
+    def at(self, path):
+        """messages at path ([] if valid). errors under path are not included, see iter_paths()"""
+        return self.paths.get(tuple(path), [])
+
+    def iter_paths(self, prefix=()):
+        """(path, messages) of the errors at or under prefix"""
+        prefix = tuple(prefix)
+        if not prefix:
+            return iter(self.paths.items())
+        n = len(prefix)
+        return ((path, messages) for path, messages in self.paths.items() if path[:n] == prefix)
+
+    @property
+    def nested(self):
+        return self.owner.errors
+
+    def __contains__(self, path):
+        return tuple(path) in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return "<ErrorStore {!r}>".format(self.paths)
@@ -0,0 +1,167 @@
+# -*- coding:utf-8 -*-
+"""
+routing the flat keys of an HTML form (e.g. request.POST) into the nested params of a form.
+
+    points-0-x=1&points-0-y=2&center-x=0  (style="formset", like the prefixes of django's formsets)
+    points.0.x=1&points[0].y=2&center[x]=0  (style="dotted")
+
+each key is split into tokens and walked down the router of the form class (compiled once per
+class from its shape, see router_of()), so the params are built in one pass over the keys. keys
+which the form doesn't read (e.g. csrfmiddlewaretoken, "points-TOTAL_FORMS" of a management form)
+are skipped. items of a sequence are ordered by their index, missing indexes are left out (the
+posted indexes are kept, see posted_path()). declared nodes and sequences without any key (an
+empty section of the form) are {} and [].
+"""
+import re
+from .shape import ANY, VALUES, Array, Object, shape_of
+
+MAX_INDEX = 1000  # same as the absolute max of django's formsets
+
+# leaves of a router
+_VALUE = "value"  # the last value of the key
+_VALUES = "values"  # all values of the key (e.g. a MultipleChoiceField)
+_ANY = "any"  # not declared, nested as dicts of the tokens
+
+_DOTTED = re.compile(r"[^.\[\]]+")
+
+
+def _split_formset(key):
+    return key.split("-")
+
+
+STYLES = {
+    "formset": _split_formset,  # points-0-x
+    "dotted": _DOTTED.findall,  # points.0.x, points[0].x, points[0][x]
+}
+
+
+class _Object(object):
+    """routes: {key: router}. containers: ((key, router), ...) of the nested objects and lists"""
+    __slots__ = ("routes", "containers")
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.containers = tuple((k, r) for k, r in routes.items() if isinstance(r, (_Object, _Items)))
+
+
+class _Items(object):
+    __slots__ = ("route", )
+
+    def __init__(self, route):
+        self.route = route
+
+
+def router_from_shape(shape):
+    """router of the params of a shape (see shape.py)"""
+    if type(shape) is Array:
+        return _Items(router_from_shape(shape.items))
+    if type(shape) is Object:
+        if shape.additional:
+            return _ANY  # e.g. hand-written factories may read any key
+        routes = {}
+        for key, sub in shape.properties.items():
+            if sub is ANY:
+                routes[key] = _VALUE
+            elif sub is VALUES:
+                routes[key] = _VALUES
+            else:
+                routes[key] = router_from_shape(sub)
+        return _Object(routes)
+    return _ANY
+
+
+def router_of(formclass):
+    """router of the params read by formclass (a TreeForm, a Sequence or a django Form)"""
+    return router_from_shape(shape_of(formclass))
+
+
+def splitter(style):
+    """the function splitting a key into tokens, style is a name in STYLES or a function"""
+    if callable(style):
+        return style
+    try:
+        return STYLES[style]
+    except KeyError:
+        raise ValueError("unknown style {!r}, expected one of {} or a function".format(style, sorted(STYLES)))
+
+
+def route(data, router, split, max_index=MAX_INDEX, indexes=None):
+    """params of the flat keys of data (a QueryDict or a dict), in one pass over the keys.
+    an index above max_index is a ValueError. if indexes is a dict, it is filled with
+    {key path of a list: [posted index of each item]} (see posted_path())"""
+    width = len(str(max_index))
+    indexed = []  # (container, key, {index: item}, posted path), converted to lists at the end
+
+    def new(router, into, key, path):
+        child = into[key] = {}
+        if type(router) is _Items:
+            indexed.append((into, key, child, path))
+        elif type(router) is _Object:
+            for k, sub in router.containers:
+                new(sub, child, k, path + (k, ))
+        return child
+
+    holder = {}
+    root = new(router, holder, None, ())
+    if hasattr(data, "lists"):
+        pairs = data.lists()
+    else:
+        pairs = ((k, v if isinstance(v, list) else [v]) for k, v in data.items())
+    for name, values in pairs:
+        r = router
+        container = root
+        tokens = split(name)
+        last = len(tokens) - 1
+        walked = []
+        for i, token in enumerate(tokens):
+            if type(r) is _Object:
+                r = r.routes.get(token)
+                if r is None:
+                    break  # not read by the form
+            elif type(r) is _Items:
+                if not (token.isdigit() and token.isascii()):
+                    break  # e.g. "points-TOTAL_FORMS"
+                if len(token) > width or int(token) > max_index:
+                    raise ValueError("index {} of {!r} is above max_index={}".format(token, name, max_index))
+                token = int(token)
+                r = r.route
+            elif r is not _ANY:
+                break  # under a field
+            walked.append(token)
+            if i == last:
+                if r is _VALUES:
+                    container[token] = values
+                elif r is _VALUE or r is _ANY:
+                    container[token] = values[-1]
+                # else a key naming a node or a sequence, e.g. "points=1", skipped
+            else:
+                child = container.get(token)
+                if child is None:
+                    if not (type(r) is _Object or type(r) is _Items or r is _ANY):
+                        break  # e.g. "name-x", a field has no keys under it
+                    child = new(r, container, token, tuple(walked))
+                elif type(child) is not dict:
+                    break
+                container = child
+    positions = {}  # {posted path of a list: {posted index: index}}
+    for into, key, items, path in reversed(indexed):  # inner lists first
+        order = sorted(items)
+        into[key] = [items[i] for i in order]
+        if indexes is not None:
+            positions[path] = order
+    if indexes is not None:
+        moved = {path: {posted: i for i, posted in enumerate(order)} for path, order in positions.items()}
+        for path, order in positions.items():
+            compacted = tuple(
+                moved[path[:i]][token] if path[:i] in moved else token for i, token in enumerate(path)
+            )
+            indexes[compacted] = order
+    return holder[None]
+
+
+def posted_path(path, indexes):
+    """the key path as posted, of the key path of the params (the items of a list are compacted by route())"""
+    return tuple(
+        indexes[path[:i]][token] if type(token) is int and path[:i] in indexes else token
+        for i, token in enumerate(path)
+    )
@@ -0,0 +1,275 @@
+# -*- coding:utf-8 -*-
+"""
+decoding JSON guided by the declared schema of a form.
+
+objects decode only their declared keys, the values of unknown keys are skipped without
+being built. a schema is a dict ({key: schema}, an object), a list ([schema], an array
+of items), or None (anything, decoded as is).
+"""
+import codecs
+import json
+import re
+from json.decoder import JSONDecodeError, scanstring
+from .shape import Array, Object, shape_of
+
+_WS = re.compile(r"[ \t\n\r]*")
+# the same grammar as json.loads(): no control characters in strings, only valid escapes
+_STRING = re.compile(r'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*"')
+_SCALAR = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null|NaN|-?Infinity")
+_decoder = json.JSONDecoder()
+_MISSING = object()
+
+
+def schema_from_shape(shape):
+    """schema of the params of a shape (see shape.py)"""
+    if type(shape) is Array:
+        return [schema_from_shape(shape.items)]
+    if type(shape) is Object:
+        if shape.additional:
+            return None  # e.g. hand-written factories may read any key
+        return {key: schema_from_shape(sub) for key, sub in shape.properties.items()}
+    return None
+
+
+def schema_of(formclass):
+    """schema of the params read by formclass (a TreeForm, a Sequence or a django Form)"""
+    return schema_from_shape(shape_of(formclass))
+
+
+def _ws(text, pos):
+    return _WS.match(text, pos).end()
+
+
+def _char(text, pos):
+    try:
+        return text[pos]
+    except IndexError:
+        raise JSONDecodeError("Expecting value", text, pos)
+
+
+def _scalar(text, pos):
+    m = (_STRING if text[pos] == '"' else _SCALAR).match(text, pos)
+    if m is None:
+        raise JSONDecodeError("Invalid string" if text[pos] == '"' else "Expecting value", text, pos)
+    return m.end()
+
+
+def _member_value(text, pos):
+    # position of the value of the member at pos ('"key": value')
+    if _char(text, pos) != '"':
+        raise JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+    pos = _ws(text, _scalar(text, pos))
+    if _char(text, pos) != ":":
+        raise JSONDecodeError("Expecting ':' delimiter", text, pos)
+    return _ws(text, pos + 1)
+
+
+def skip(text, pos):
+    """end of the value at pos, checked with the grammar of json.loads() but nothing is built"""
+    stack = []  # closing brackets of the open containers
+    while True:
+        c = _char(text, pos)
+        if c == "{" or c == "[":
+            close = "}" if c == "{" else "]"
+            pos = _ws(text, pos + 1)
+            if _char(text, pos) != close:
+                stack.append(close)
+                pos = _member_value(text, pos) if close == "}" else pos
+                continue
+            pos += 1
+        else:
+            pos = _scalar(text, pos)
+        while stack:  # after a value: the next member/item, or the end of containers
+            pos = _ws(text, pos)
+            c = _char(text, pos)
+            if c == ",":
+                pos = _ws(text, pos + 1)
+                if stack[-1] == "}":
+                    pos = _member_value(text, pos)
+                break
+            if c != stack[-1]:
+                raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+            stack.pop()
+            pos += 1
+        else:
+            return pos
+
+
+def _iter_members(text, pos):
+    """(key, position of the value) of the object at pos. the caller moves past each value,
+    and sends its end back"""
+    pos = _ws(text, pos + 1)
+    if _char(text, pos) == "}":
+        return pos + 1
+    while True:
+        if _char(text, pos) != '"':
+            raise JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+        key, pos = scanstring(text, pos + 1)
+        pos = _ws(text, pos)
+        if _char(text, pos) != ":":
+            raise JSONDecodeError("Expecting ':' delimiter", text, pos)
+        pos = yield key, _ws(text, pos + 1)
+        pos = _ws(text, pos)
+        c = _char(text, pos)
+        if c == "}":
+            return pos + 1
+        if c != ",":
+            raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+        pos = _ws(text, pos + 1)
+
+
+def _iter_items(text, pos):
+    pos = _ws(text, pos + 1)
+    if _char(text, pos) == "]":
+        return pos + 1
+    while True:
+        pos = _ws(text, (yield pos))
+        c = _char(text, pos)
+        if c == "]":
+            return pos + 1
+        if c != ",":
+            raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+        pos = _ws(text, pos + 1)
+
+
+def _walk(members, visit):
+    # drives _iter_members/_iter_items, visit(member) returns the end of its value
+    try:
+        member = next(members)
+        while True:
+            member = members.send(visit(member))
+    except StopIteration as e:
+        return e.value
+
+
+def decode(text, schema, pos=0):
+    """(value, end) of the JSON value at pos, keeping only what the schema declares"""
+    pos = _ws(text, pos)
+    c = _char(text, pos)
+    if schema is None or (type(schema) is dict and c != "{") or (type(schema) is list and c != "["):
+        return _decoder.raw_decode(text, pos)
+    if type(schema) is dict:
+        result = {}
+
+        def visit(member):
+            key, start = member
+            sub = schema.get(key, _MISSING)
+            if sub is _MISSING:
+                return skip(text, start)
+            result[key], end = decode(text, sub, start)
+            return end
+        return result, _walk(_iter_members(text, pos), visit)
+    items = []
+    item_schema = schema[0]
+
+    def visit_item(start):
+        value, end = decode(text, item_schema, start)
+        items.append(value)
+        return end
+    return items, _walk(_iter_items(text, pos), visit_item)
+
+
+def loads(text, schema):
+    value, end = decode(text, schema)
+    end = _ws(text, end)
+    if end != len(text):
+        raise JSONDecodeError("Extra data", text, end)
+    return value
+
+
+def locate(text, paths):
+    """{path: position} of the values at paths (key paths of the decoded params), in one pass.
+    subtrees without any of the paths are skipped"""
+    trie = {}
+    for path in paths:
+        node = trie
+        for key in path:
+            node = node.setdefault(key, {})
+        node[_MISSING] = path
+    found = {}
+
+    def walk(pos, node):
+        if _MISSING in node:
+            found[node[_MISSING]] = pos  # on duplicated keys the last one wins, as in json.loads
+        c = _char(text, pos)
+        if c == "{":
+            def visit(member):
+                key, start = member
+                sub = node.get(key)
+                return skip(text, start) if sub is None else walk(start, sub)
+            return _walk(_iter_members(text, pos), visit)
+        elif c == "[":
+            counter = [-1]
+
+            def visit_item(start):
+                counter[0] += 1
+                sub = node.get(counter[0])
+                return skip(text, start) if sub is None else walk(start, sub)
+            return _walk(_iter_items(text, pos), visit_item)
+        return skip(text, pos)
+    walk(_ws(text, 0), trie)
+    return found
+
+
+class SequenceErrors(dict):
+    """errors of a sequence which has errors of its own (of its clean hooks, batch_clean, max_items, ...)
+    in the nested shape: {"__all__": [message, ...], "items": [errors of each item]}.
+    a sequence without them is the list of the errors of its items"""
+    __slots__ = ()
+
+
+def iter_error_paths(errors, path=()):
+    """(path, messages) of each error list in errors (nested dicts/lists of a TreeForm)"""
+    if isinstance(errors, SequenceErrors):  # "items" is not a key of the params
+        if errors["__all__"]:
+            yield path, list(errors["__all__"])
+        for row in iter_error_paths(errors["items"], path):
+            yield row
+    elif isinstance(errors, dict):
+        for k, v in errors.items():
+            if k == "__all__":
+                if v:
+                    yield path, list(v)
+            else:
+                for row in iter_error_paths(v, path + (k, )):
+                    yield row
+    elif isinstance(errors, list):
+        if errors and all(e is None or isinstance(e, (dict, list)) for e in errors):
+            for i, v in enumerate(errors):
+                for row in iter_error_paths(v, path + (i, )):
+                    yield row
+        elif errors:
+            yield path, list(errors)
+
+
+class JSONSource(object):
+    """decoded JSON document, to map key paths back to byte offsets"""
+    def __init__(self, text, encoding="utf-8"):
+        self.text = text
+        self.encoding = encoding
+
+    @classmethod
+    def read(cls, source):
+        """source: bytes, str, or a file"""
+        if hasattr(source, "read"):
+            source = source.read()
+        if isinstance(source, str):
+            return cls(source)
+        encoding = json.detect_encoding(source)
+        return cls(source.decode(encoding), encoding)
+
+    def byte_offset(self, pos):
+        return len(self.text[:pos].encode(self.encoding))
+
+    def offsets(self, paths):
+        """{path: byte offset} of the values at paths (paths not in the document are left out).
+        the positions are sorted, and the text between them is encoded once"""
+        text = self.text
+        encode = codecs.getincrementalencoder(self.encoding)().encode  # a BOM is counted once
+        offsets = {}
+        pos = n_bytes = 0
+        for path, end in sorted(locate(text, paths).items(), key=lambda item: item[1]):
+            n_bytes += len(encode(text[pos:end]))
+            pos = end
+            offsets[path] = n_bytes
+        return offsets
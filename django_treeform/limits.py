@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+"""
+size limits of the params, checked before any node or form is built.
+"""
+from itertools import islice
+
+TOO_MANY_ITEMS = "Ensure this list has at most {} items (it has {})."
+TOO_DEEP = "Ensure the data is nested at most {} levels deep."
+TOO_MANY_VALUES = "Ensure the data has at most {} values (it has at least {})."
+
+
+def too_many_items(list_of_params, max_items):
+    """a message if list_of_params has more than max_items items, else None"""
+    if max_items is None or len(list_of_params) <= max_items:
+        return None
+    return TOO_MANY_ITEMS.format(max_items, len(list_of_params))
+
+
+def read_items(items, max_items):
+    """(items as a list or a tuple, a message if there are more than max_items items, else None).
+    other iterables (e.g. a generator) are read once, up to max_items + 1 items"""
+    if isinstance(items, (list, tuple)):
+        return items, too_many_items(items, max_items)
+    if max_items is None:
+        return list(items), None
+    items = list(islice(items, max_items + 1))
+    if len(items) <= max_items:
+        return items, None
+    return items, TOO_MANY_ITEMS.format(max_items, "more")
+
+
+def scan(params, max_depth=None, max_total_nodes=None):
+    """a message if params is nested deeper than max_depth (dicts and lists), or has more than
+    max_total_nodes values (dicts, lists and scalars), else None.
+    stops as soon as a limit is exceeded, so the cost is bounded by the limits"""
+    n = 1
+    stack = [(iter((params, )), 0)]
+    while stack:
+        values, depth = stack[-1]
+        for value in values:
+            if isinstance(value, dict):
+                children = value.values()
+            elif isinstance(value, (list, tuple)):
+                children = value
+            else:
+                continue
+            if max_depth is not None and depth >= max_depth:
+                return TOO_DEEP.format(max_depth)
+            n += len(children)
+            if max_total_nodes is not None and n > max_total_nodes:
+                return TOO_MANY_VALUES.format(max_total_nodes, n)
+            stack.append((iter(children), depth + 1))
+            break
+        else:
+            stack.pop()
+    return None
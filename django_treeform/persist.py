@@ -0,0 +1,117 @@
+# -*- coding:utf-8 -*-
+"""
+saving a validated tree with bulk_create.
+
+nodes and sequences declared with `model=` are saved level by level: all instances of a
+level are created with one bulk_create per model (in batches), then their children get the
+created instances as parents (through `fk=`, or the only foreign key to the parent model).
+instances are built from cleaned_data directly, keys which are not model fields are ignored.
+
+the children need the primary keys of their parents, which are set by bulk_create only if the
+database returns the inserted rows (features.can_return_rows_from_bulk_insert, e.g. PostgreSQL,
+SQLite 3.35+, MariaDB 10.5+). on other databases (e.g. MySQL) the instances which have children
+are saved one by one, the others are still created in bulk.
+"""
+from django.db import connections, router, transaction
+
+
+class _Binding(object):
+    """model fields and the foreign key to the parent model, computed once per declaration"""
+    def __init__(self, model, fk, parent_model):
+        self.model = model
+        fields = model._meta.concrete_fields
+        self.names = frozenset([f.name for f in fields] + [f.attname for f in fields])
+        if parent_model is None:
+            self.fk = None
+        elif fk is not None:
+            self.fk = fk
+        else:
+            candidates = [
+                f.name for f in model._meta.concrete_fields
+                if f.is_relation and f.related_model is not None and issubclass(parent_model, f.related_model)
+            ]
+            if len(candidates) != 1:
+                raise ValueError("{} has {} foreign keys to {}, pass fk=".format(
+                    model.__name__, len(candidates), parent_model.__name__
+                ))
+            self.fk = candidates[0]
+
+    def build(self, cleaned_data, parent):
+        names = self.names
+        kwargs = {k: v for k, v in cleaned_data.items() if k in names}
+        if self.fk is not None:
+            kwargs[self.fk] = parent
+        return self.model(**kwargs)
+
+
+def _binding(bindings, declaration, model, fk, parent_model):
+    key = (id(declaration), parent_model)
+    binding = bindings.get(key)
+    if binding is None:
+        binding = bindings[key] = _Binding(model, fk, parent_model)
+    return binding
+
+
+def _collect(ob, parent, units, bindings):
+    """units: [(binding, cleaned_data, parent instance, validated form or None)]"""
+    from . import _BaseSequence, _Node, _TreeForm
+    parent_model = None if parent is None else type(parent)
+    if isinstance(ob, _BaseSequence):
+        wrapper = ob.wrapper
+        forms = getattr(ob, "validated_forms", None)
+        if getattr(wrapper, "model", None) is not None:
+            binding = _binding(bindings, wrapper, wrapper.model, wrapper.fk, parent_model)
+            for i, cleaned_data in ob._batch_rows(None):
+                units.append((binding, cleaned_data, parent, None if forms is None else forms[i]))
+        elif forms is not None:
+            for form in forms:
+                _collect(form, parent, units, bindings)
+    elif isinstance(ob, _Node):
+        spec = ob.spec
+        if spec.model is not None:
+            binding = _binding(bindings, spec, spec.model, spec.fk, parent_model)
+            units.append((binding, ob.cleaned_data, parent, ob.form))
+        else:
+            _collect(ob.form, parent, units, bindings)
+    elif isinstance(ob, _TreeForm):
+        for node in ob._nodes:
+            if node is not None and isinstance(node, _Node) and node.is_cleaned:
+                _collect(node, parent, units, bindings)
+
+
+def save_bulk(ob, batch_size=None, using=None):
+    """save the bound nodes and sequences under a validated ob. returns the instances of the top level.
+    parents are saved one by one if the database doesn't return the pks of bulk_create (see above)"""
+    if not ob.is_cleaned:
+        raise RuntimeError("is_valid() is not called")
+    if ob.has_error():
+        raise ValueError("the data didn't validate, so nothing can be saved")
+    bindings = {}
+    units = []
+    _collect(ob, None, units, bindings)
+    if not units:
+        return []
+    using = using or router.db_for_write(units[0][0].model)
+    can_return_pks = connections[using].features.can_return_rows_from_bulk_insert
+    top = None
+    with transaction.atomic(using=using):
+        while units:
+            created = []
+            for binding, cleaned_data, parent, form in units:
+                created.append((binding.model, binding.build(cleaned_data, parent), form))
+            units = []
+            for _, instance, form in created:
+                if form is not None:
+                    _collect(form, instance, units, bindings)
+            parents = frozenset() if can_return_pks else frozenset(id(unit[2]) for unit in units)
+            by_model = {}
+            for model, instance, _ in created:
+                if id(instance) in parents:
+                    instance.save(force_insert=True, using=using)  # its pk is needed by the children
+                else:
+                    by_model.setdefault(model, []).append(instance)
+            for model, instances in by_model.items():
+                model._default_manager.db_manager(using).bulk_create(instances, batch_size=batch_size)
+            if top is None:
+                top = [instance for _, instance, _ in created]
+    return top
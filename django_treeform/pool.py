@@ -0,0 +1,78 @@
+# -*- coding:utf-8 -*-
+"""
+pools of TreeForm instances, reset and rebound to new params instead of being rebuilt.
+
+    with PersonForm.checkout(params) as formlike:
+        if formlike.is_valid():
+            save(formlike.cleaned_data)
+
+a checked out instance behaves as PersonForm(params). its nodes are reset in place (lazily,
+when they are used), and so are the django forms in them: the fields deep-copied by
+Form.__init__() are kept, only the bound data and the results are dropped. forms with their
+own __init__ are rebuilt, they may set up their fields from the params.
+
+the free instances are kept per thread (at most maxsize each), so checkout needs no lock,
+and tasks of an event loop share the pool of their thread. cleaned_data and errors taken out
+of a checked out instance stay valid after it is returned, they are rebuilt, not mutated.
+"""
+import threading
+from contextlib import contextmanager
+from django import forms
+from django.utils.datastructures import MultiValueDict
+
+
+def is_rebindable(formclass):
+    """True if instances of the django Form class can be rebound to new data"""
+    return formclass.__init__ is forms.BaseForm.__init__
+
+
+def rebind_django_form(form, data):
+    """form bound to data, as if built by type(form)(data)"""
+    form.is_bound = data is not None
+    form.data = MultiValueDict() if data is None else data
+    form._errors = None
+    form._bound_fields_cache = {}
+    form.__dict__.pop("cleaned_data", None)
+    form.__dict__.pop("changed_data", None)  # cached_property
+    return form
+
+
+class FormPool(object):
+    """free instances of formclass (a TreeForm class), at most maxsize per thread"""
+    def __init__(self, formclass, maxsize=8):
+        self.formclass = formclass
+        self.maxsize = maxsize
+        self.local = threading.local()
+        self.hits = 0  # approximate under threads
+        self.misses = 0
+
+    def _free(self):
+        free = getattr(self.local, "free", None)
+        if free is None:
+            free = self.local.free = []
+        return free
+
+    def acquire(self, params, **kwargs):
+        """an instance bound to params, reset from the pool if possible"""
+        free = self._free()
+        if free:
+            form = free.pop()
+            form._reset(params, **kwargs)
+            self.hits += 1
+            return form
+        self.misses += 1
+        return self.formclass(params, **kwargs)
+
+    def release(self, form):
+        """give back an acquired instance, it must not be used after that"""
+        free = self._free()
+        if len(free) < self.maxsize:
+            free.append(form)
+
+    @contextmanager
+    def checkout(self, params, **kwargs):
+        form = self.acquire(params, **kwargs)
+        try:
+            yield form
+        finally:
+            self.release(form)
@@ -0,0 +1,142 @@
+# -*- coding:utf-8 -*-
+"""
+structural schema of the params of a form, and a cheap check of the params against it.
+
+the schema is derived from the declarations (once per class, see shape_of()): a TreeForm
+or a django Form is an object of its declared keys, a Sequence is an array of its items,
+the value of a field is anything (its type is checked by the field). the nodes of a
+TreeForm are required keys. check() walks the params once, before any form is built, and
+reports mismatched containers, missing nodes, unexpected keys and too long lists by key path.
+
+the shape is also the source of the schema of the JSON decoder (jsonload.schema_from_shape())
+and of the router of flat keys (flatkeys.router_from_shape()).
+"""
+from django import forms
+from .limits import too_many_items
+
+EXPECTED_OBJECT = "Expected an object."
+EXPECTED_LIST = "Expected a list."
+REQUIRED = "This key is required."
+UNEXPECTED = "Unexpected key."
+
+ANY = None  # anything, not checked
+VALUES = "values"  # a field reading all the values of its key (e.g. a MultipleChoiceField), not checked
+
+
+class Object(object):
+    """properties: {key: shape}. required: the keys which must be present.
+    additional: False if other keys are unexpected"""
+    __slots__ = ("properties", "required", "additional")
+
+    def __init__(self, properties, required=(), additional=False):
+        self.properties = properties
+        self.required = tuple(required)
+        self.additional = additional
+
+
+class Array(object):
+    __slots__ = ("items", "max_items")
+
+    def __init__(self, items, max_items=None):
+        self.items = items
+        self.max_items = max_items
+
+
+def field_keys(name, field):
+    """keys of the params read by the field `name` of a django Form"""
+    widget = field.widget
+    if isinstance(widget, forms.MultiWidget):  # reads "<name>_0", "<name>_1", ...
+        suffixes = getattr(widget, "widgets_names", None) or ["_{}".format(i) for i in range(len(widget.widgets))]
+        return [name + suffix for suffix in suffixes]
+    return [name]
+
+
+def _leaf(field):
+    return VALUES if getattr(field.widget, "allow_multiple_selected", False) else ANY
+
+
+def shape_of(formclass):
+    """shape of the params read by formclass (a TreeForm, a Sequence or a django Form)"""
+    from . import TreeFormMeta, SequenceWrapper
+    if isinstance(formclass, SequenceWrapper):
+        return Array(shape_of(formclass.formclass), formclass.max_items)
+    if isinstance(formclass, TreeFormMeta):
+        properties = {}
+        required = []
+        additional = False
+        for keyname, field in formclass.plan.fields:
+            properties[keyname] = _leaf(field)
+        for keyname, factory in formclass.plan.nodes:
+            spec = getattr(factory, "args", (None, ))[0]
+            if keyname is None or spec is None:
+                additional = True  # hand-written factories may read any key
+                continue
+            properties[keyname] = shape_of(spec.formclass)
+            required.append(keyname)
+        return Object(properties, required, additional)
+    if isinstance(formclass, type) and issubclass(formclass, forms.BaseForm):
+        if formclass.prefix is not None:
+            return Object({}, additional=True)
+        properties = {}
+        for name, field in formclass.base_fields.items():
+            for key in field_keys(name, field):
+                properties[key] = _leaf(field) if key == name else ANY
+        return Object(properties)
+    return ANY
+
+
+def to_json_schema(shape):
+    """JSON Schema (draft 2020-12) of a shape"""
+    if type(shape) is Object:
+        schema = {
+            "type": "object",
+            "properties": {k: to_json_schema(v) for k, v in shape.properties.items()},
+            "additionalProperties": shape.additional,
+        }
+        if shape.required:
+            schema["required"] = list(shape.required)
+        return schema
+    if type(shape) is Array:
+        schema = {"type": "array", "items": to_json_schema(shape.items)}
+        if shape.max_items is not None:
+            schema["maxItems"] = shape.max_items
+        return schema
+    return {}
+
+
+def check(params, shape, limit=None):
+    """[(path, message), ...] of the structural errors of params, in document order.
+    stops after `limit` errors"""
+    problems = []
+    stack = [((), params, shape)]
+    while stack:
+        path, value, shape = stack.pop()
+        if type(shape) is Object:
+            if not isinstance(value, dict):
+                problems.append((path, EXPECTED_OBJECT))
+            else:
+                for key in shape.required:
+                    if key not in value:
+                        problems.append((path + (key, ), REQUIRED))
+                properties = shape.properties
+                children = []
+                for key, v in value.items():
+                    if key in properties:
+                        sub = properties[key]
+                        if type(sub) is Object or type(sub) is Array:
+                            children.append((path + (key, ), v, sub))
+                    elif not shape.additional:
+                        problems.append((path + (key, ), UNEXPECTED))
+                children.reverse()
+                stack.extend(children)
+        elif type(shape) is Array:
+            if not isinstance(value, (list, tuple)):
+                problems.append((path, EXPECTED_LIST))
+            elif shape.max_items is not None and len(value) > shape.max_items:
+                problems.append((path, too_many_items(value, shape.max_items)))  # the items are not walked
+            elif shape.items is not ANY:
+                items = shape.items
+                stack.extend((path + (i, ), value[i], items) for i in range(len(value) - 1, -1, -1))
+        if limit is not None and len(problems) >= limit:
+            return problems[:limit]
+    return problems
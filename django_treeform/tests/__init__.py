@@ -2,5 +2,7 @@
 # xxx: i don't know that code like below is good.
 import django
 from django.conf import settings
-settings.configure()
+settings.configure(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+)
 django.setup()
@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+from django_treeform import TreeForm, Node, SequenceNode
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class PointListForm(TreeForm):
+    name = forms.CharField()
+    center = Node(PointForm)
+    points = SequenceNode(PointForm)
+
+
+class HookedPointListForm(PointListForm):
+    def clean(self):
+        pass
+
+
+class OptionalXForm(PointForm):
+    def __init__(self, *args, **kwargs):
+        super(OptionalXForm, self).__init__(*args, **kwargs)
+        self.fields["x"].required = False
+
+
+class OptionalXListForm(TreeForm):
+    center = Node(OptionalXForm)
+    points = SequenceNode(OptionalXForm)
+
+
+class ValidateManyTests(unittest.TestCase):
+    def _callFUT(self, formclass, records, **kwargs):
+        return formclass.validate_many(records, **kwargs)
+
+    def _records(self):
+        point = {"x": "1", "y": "2"}
+        valid = {"name": "foo", "center": point, "points": [point, point]}
+        invalid = {"name": "", "center": {"x": "a", "y": "2"}, "points": [point, {"x": "1"}]}
+        return [valid, invalid, valid]
+
+    def test_compiled(self):
+        from django_treeform.bulk import compile_validator
+        self.assertIsNotNone(compile_validator(PointListForm))
+        self.assertIsNone(compile_validator(HookedPointListForm))
+
+    def test_it(self):
+        result = self._callFUT(PointListForm, self._records())
+        self.assertEqual(len(result), 3)
+        self.assertEqual(list(result.valid), [1, 0, 1])
+        self.assertFalse(result.is_valid())
+        self.assertEqual(result.cleaned_data[0], {
+            "name": "foo", "center": {"x": 1, "y": 2}, "points": [{"x": 1, "y": 2}, {"x": 1, "y": 2}]
+        })
+        self.assertEqual(result.errors, {1: {
+            ("name", ): ["This field is required."],
+            ("center", "x"): ["Enter a whole number."],
+            ("points", 1, "y"): ["This field is required."],
+        }})
+        self.assertEqual(len(result.valid_rows()), 2)
+
+    def test_same_as_instances(self):
+        compiled = self._callFUT(PointListForm, self._records())
+        fallback = self._callFUT(HookedPointListForm, self._records())
+        self.assertEqual(list(compiled.valid), list(fallback.valid))
+        self.assertEqual(compiled.cleaned_data, fallback.cleaned_data)
+        self.assertEqual(compiled.errors, fallback.errors)
+
+    def test_same_as_is_valid(self):
+        # forms whose __init__ sets up the fields are not compiled
+        from django_treeform.bulk import compile_validator
+        self.assertIsNone(compile_validator(OptionalXListForm))
+        records = [
+            {"center": {"y": "1"}, "points": [{"y": "2"}, {"x": "a", "y": "2"}]},
+            {"center": {"y": "1"}, "points": []},
+        ]
+        result = self._callFUT(OptionalXListForm, records)
+        for i, params in enumerate(records):
+            formlike = OptionalXListForm(params)
+            self.assertEqual(bool(result.valid[i]), formlike.is_valid())
+            self.assertEqual(result.errors.get(i, {}), formlike.error_store.paths)
+
+    def test_not_an_object(self):
+        class RouteForm(TreeForm):
+            routes = SequenceNode(PointListForm)
+
+        point = {"x": "1", "y": "2"}
+        for formclass, params in [(PointListForm, {"name": "a", "center": point, "points": [None, point, 5]}),
+                                  (RouteForm, {"routes": [None]})]:
+            result = self._callFUT(formclass, [params])
+            formlike = formclass(params)
+            self.assertFalse(formlike.is_valid())
+            self.assertFalse(result.valid[0])
+            self.assertEqual(result.errors[0], formlike.error_store.paths)
+
+    def test_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(2) as executor:
+            result = self._callFUT(PointListForm, self._records() * 3, executor=executor, chunksize=2)
+        self.assertEqual(list(result.valid), [1, 0, 1] * 3)
+        self.assertEqual(sorted(result.errors), [1, 4, 7])
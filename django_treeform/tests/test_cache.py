@@ -0,0 +1,120 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class AddressForm(forms.Form):
+    pure_validation = True
+    city = forms.CharField(max_length=8)
+    zipcode = forms.IntegerField()
+
+
+class ImpureAddressForm(forms.Form):
+    city = forms.CharField(max_length=8)
+    zipcode = forms.IntegerField()
+
+
+class FreezeTests(unittest.TestCase):
+    def _callFUT(self, ob):
+        from django_treeform.cache import freeze
+        return freeze(ob)
+
+    def test_canonical(self):
+        self.assertEqual(self._callFUT({"a": 1, "b": [1, 2]}), self._callFUT({"b": [1, 2], "a": 1}))
+
+    def test_types_are_distinguished(self):
+        self.assertNotEqual(self._callFUT({"a": 1}), self._callFUT({"a": "1"}))
+        self.assertNotEqual(self._callFUT({"a": 1}), self._callFUT({"a": True}))
+        self.assertNotEqual(self._callFUT([]), self._callFUT({}))
+
+    def test_unhashable(self):
+        self.assertIsNone(self._callFUT({"a": set()}))
+
+
+class ValidationCacheTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import ValidationCache
+        return ValidationCache
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTarget()(*args, **kwargs)
+
+    def test_lru(self):
+        cache = self._makeOne(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "evictions": 1, "size": 2})
+
+    def test_ttl(self):
+        now = [0]
+        cache = self._makeOne(ttl=10, timer=lambda: now[0])
+        cache.set("a", 1)
+        now[0] = 9
+        self.assertEqual(cache.get("a"), 1)
+        now[0] = 10
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class CachedSequenceTests(unittest.TestCase):
+    def _makeOne(self, formclass, cache):
+        from django_treeform import Sequence
+        return Sequence(formclass, cache=cache)
+
+    def _params(self):
+        return [{"city": "Tokyo", "zipcode": "100"}] * 3 + [{"city": "Tokyo", "zipcode": "x"}] * 2
+
+    def test_it(self):
+        from django_treeform import ValidationCache
+        cache = ValidationCache()
+        formlike = self._makeOne(AddressForm, cache)(self._params())
+
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(cache.stats()["hits"], 3)
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(formlike.cleaned_data[2], {"city": "Tokyo", "zipcode": 100})
+        self.assertEqual(formlike.errors[:3], [{}, {}, {}])
+        self.assertEqual(formlike.errors[4], {"zipcode": ["Enter a whole number."]})
+
+    def test_results_are_not_shared(self):
+        from django_treeform import ValidationCache
+        cache = ValidationCache()
+        formlike = self._makeOne(AddressForm, cache)(self._params())
+        formlike.is_valid()
+        formlike.cleaned_data[1]["city"] = "Osaka"
+        self.assertEqual(formlike.cleaned_data[2]["city"], "Tokyo")
+
+    def test_impure_form_is_not_cached(self):
+        from django_treeform import ValidationCache
+        cache = ValidationCache()
+        formlike = self._makeOne(ImpureAddressForm, cache)(self._params())
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 0, "evictions": 0, "size": 0})
+
+    def test_node_with_treeform(self):
+        from django_treeform import ValidationCache, TreeForm, Node
+
+        class PersonForm(TreeForm):
+            pure_validation = True
+            name = forms.CharField()
+            address = Node(AddressForm)
+
+        cache = ValidationCache()
+
+        class FamilyForm(TreeForm):
+            father = Node(PersonForm, cache=cache)
+            mother = Node(PersonForm, cache=cache)
+
+        person = {"name": "foo", "address": {"city": "Tokyo", "zipcode": "100"}}
+        formlike = FamilyForm({"father": person, "mother": dict(person)})
+        self.assertTrue(formlike.is_valid())
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(formlike.cleaned_data["mother"], formlike.cleaned_data["father"])
+        self.assertEqual(formlike.errors["mother"], {"name": [], "address": {}})
+
+        self.assertFalse(formlike.patch(("mother", "address", "zipcode"), "x"))
+        self.assertEqual(formlike.errors["mother"]["address"], {"zipcode": ["Enter a whole number."]})
@@ -0,0 +1,112 @@
+# -*- coding:utf-8 -*-
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from django import forms
+from django_treeform import TreeForm, SequenceNode
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class PersonForm(TreeForm):
+    name = forms.CharField()
+    points = SequenceNode(PointForm)
+
+
+def _records():
+    point = {"x": "1", "y": "2"}
+    records = [{"name": "foo{}".format(i), "points": [point, point]} for i in range(20)]
+    records[3] = {"name": "", "points": [point]}
+    records[11] = {"name": "bar", "points": [point, {"x": "a", "y": "2"}]}
+    return records
+
+
+class ValidateFileTests(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def _write(self, name, text):
+        path = os.path.join(self.dirname, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _callFUT(self, path, **kwargs):
+        from django_treeform.cli import validate_file
+        output = io.StringIO()
+        stats = validate_file("django_treeform.tests.test_cli:PersonForm", path, output, **kwargs)
+        return stats, output.getvalue().splitlines()
+
+    def _ndjson(self):
+        lines = [json.dumps(record) for record in _records()]
+        lines.insert(5, "")
+        lines.insert(8, "{broken")
+        return self._write("dump.ndjson", "\n".join(lines) + "\n")
+
+    def test_ndjson(self):
+        stats, report = self._callFUT(self._ndjson(), chunk_size=100, workers=0)
+        self.assertEqual((stats["records"], stats["invalid"]), (21, 3))
+        self.assertEqual(report[0], "4\tname\tThis field is required.")
+        self.assertTrue(report[1].startswith("9\t(root)\tInvalid JSON: "))
+        self.assertEqual(report[2], "14\tpoints.1.x\tEnter a whole number.")
+
+    def test_wrong_shape(self):
+        lines = [json.dumps(record) for record in _records()[:3]]
+        lines[1] = '{"name": "b"}'
+        lines.insert(2, "5")
+        lines.insert(3, '{"name": "c", "points": [[], {"x": "1", "y": "2"}], "junk": 1}')
+        stats, report = self._callFUT(self._write("dump.ndjson", "\n".join(lines) + "\n"), workers=0)
+        self.assertEqual((stats["records"], stats["invalid"]), (5, 3))
+        self.assertEqual(report, [
+            "2\tpoints\tThis key is required.",
+            "3\t(root)\tExpected an object.",
+            "4\tpoints.0\tExpected an object.",
+        ])
+
+    def test_array(self):
+        text = "[\n" + ",\n".join(json.dumps(record) for record in _records()) + "\n]\n"
+        path = self._write("dump.json", text)
+        for chunk_size in (1, 100, 1 << 20):
+            stats, report = self._callFUT(path, chunk_size=chunk_size, workers=0)
+            self.assertEqual((stats["records"], stats["invalid"]), (20, 2))
+            self.assertEqual(report, ["5\tname\tThis field is required.", "13\tpoints.1.x\tEnter a whole number."])
+
+    def test_array_chunks(self):
+        from django_treeform.cli import array_chunks
+        records = [{"name": '"],{' + "\\" * i, "points": [[], {"x": "[{"}]} for i in range(10)] + [1, "x"]
+        text = json.dumps(records).encode("utf-8")
+        for chunk_size in (1, 7, 50, 1 << 20):
+            spans = list(array_chunks(text, chunk_size))
+            self.assertEqual(spans[0][0], 1)
+            self.assertEqual(spans[-1][1], len(text) - 1)
+            items = []
+            for start, end in spans:
+                items.extend(json.loads("[" + text[start:end].decode("utf-8").lstrip(", ") + "]"))
+            self.assertEqual(items, records)
+
+    def test_process_pool(self):
+        stats, report = self._callFUT(self._ndjson(), chunk_size=100, workers=2)
+        self.assertEqual((stats["records"], stats["invalid"]), (21, 3))
+        self.assertEqual(len(report), 3)
+
+    def test_main(self):
+        from django_treeform.cli import main
+        output = os.path.join(self.dirname, "errors.tsv")
+        argv = ["validate", "django_treeform.tests.test_cli:PersonForm", self._ndjson(), "--workers", "0",
+                "--output", output]
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(main(argv), 1)
+        self.assertIn("records=21 invalid=3", stderr.getvalue())
+        with open(output) as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
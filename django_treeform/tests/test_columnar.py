@@ -0,0 +1,95 @@
+# -*- coding:utf-8 -*-
+import unittest
+from array import array
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.FloatField(min_value=0)
+    label = forms.CharField(required=False)
+
+
+class ColumnarSequenceTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import Sequence
+        return Sequence
+
+    def _makeOne(self, *args, **kwargs):
+        kwargs["columnar"] = True
+        return self._getTarget()(*args, **kwargs)
+
+    def test_it(self):
+        formlike = self._makeOne(PointForm)([{"x": "10", "y": "0.5"}, {"x": 20, "y": 1, "label": "a"}])
+        self.assertTrue(formlike.is_valid())
+        self.assertEqual(formlike.cleaned_data, {
+            "x": array("q", [10, 20]), "y": array("d", [0.5, 1.0]), "label": ["", "a"]
+        })
+        self.assertEqual(formlike.masks["x"], bytearray(b"\x01\x01"))
+        self.assertEqual(formlike.errors, [{}, {}])
+
+    def test_invalid_cells(self):
+        params = [{"x": "1.0", "y": "nan"}, {"x": "a", "y": "-1"}, {"x": "3", "y": "2"}]
+        formlike = self._makeOne(PointForm)(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.cleaned_data["x"], array("q", [1, 0, 3]))
+        self.assertEqual(formlike.cleaned_data["y"], array("d", [0, 0, 2]))
+        self.assertEqual(formlike.masks["x"], bytearray([1, 0, 1]))
+        self.assertEqual(formlike.masks["y"], bytearray([0, 0, 1]))
+        self.assertEqual(formlike.errors, [
+            {"y": ["Enter a number."]},
+            {"x": ["Enter a whole number."], "y": ["Ensure this value is greater than or equal to 0."]},
+            {},
+        ])
+        self.assertEqual(formlike.n_errors, 3)
+
+    def test_same_as_fast(self):
+        from django_treeform import _FastSequence
+        params = [{"x": " 7 ", "y": "1e3"}, {"x": True, "y": "1"}, {"y": ""}, {"x": "2", "y": "3", "label": 1}]
+        formlike = self._makeOne(PointForm)(params)
+        fast = self._getTarget()(PointForm, fast=True)(params)
+        self.assertIsInstance(fast, _FastSequence)
+        self.assertEqual(formlike.is_valid(), fast.is_valid())
+        self.assertEqual(formlike.errors, fast.errors)
+        self.assertEqual([row for _, row in formlike._batch_rows(None)], fast.cleaned_data)
+
+    def test_batch_clean_and_patch(self):
+        def batch_clean(batch):
+            for i, cleaned_data in batch.rows:
+                if cleaned_data.get("x") == 2:
+                    batch.add_error(i, "x", "not found")
+
+        formlike = self._makeOne(PointForm, batch_clean=batch_clean)([{"x": "1", "y": "1"}, {"x": "2", "y": "1"}])
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors[1], {"x": ["not found"]})
+        self.assertEqual(formlike.masks["x"], bytearray([1, 0]))
+
+        self.assertTrue(formlike.patch((1, "x"), "3"))
+        self.assertEqual(formlike.cleaned_data["x"], array("q", [1, 3]))
+        self.assertEqual(formlike.masks["x"], bytearray([1, 1]))
+
+    def test_in_tree(self):
+        from django_treeform import TreeForm, SequenceNode
+
+        class PointListForm(TreeForm):
+            points = SequenceNode(PointForm, columnar=True)
+
+        formlike = PointListForm({"points": [{"x": "1", "y": "2"}]})
+        self.assertTrue(formlike.is_valid())
+        self.assertEqual(formlike.cleaned_data["points"]["x"], array("q", [1]))
+
+    def test_not_available(self):
+        class CustomPointForm(PointForm):
+            def clean_x(self):
+                return self.cleaned_data["x"]
+
+        with self.assertRaises(ValueError):
+            self._makeOne(CustomPointForm)
+
+    def test_to_numpy(self):
+        from django_treeform import columnar
+        if columnar.numpy is None:
+            raise unittest.SkipTest("numpy is not installed")
+        formlike = self._makeOne(PointForm)([{"x": "1", "y": "2"}])
+        formlike.is_valid()
+        self.assertEqual(formlike.to_numpy()["x"].dtype, columnar.numpy.int64)
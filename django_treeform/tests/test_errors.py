@@ -0,0 +1,107 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+def _negative_center(node):
+    if node.cleaned_data.get("x", 0) < 0:
+        raise forms.ValidationError("negative")
+
+
+class ErrorStoreTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class PointListForm(TreeForm):
+            name = forms.CharField()
+            center = Node(PointForm, clean=_negative_center)
+            points = SequenceNode(PointForm)
+            fast_points = SequenceNode(PointForm, fast=True)
+
+            def clean(self):
+                if self.has_error():
+                    raise forms.ValidationError("oops")
+        return PointListForm
+
+    def _makeOne(self, params):
+        return self._getTarget()(params)
+
+    def _params(self):
+        point = {"x": "1", "y": "2"}
+        return {
+            "name": "",
+            "center": {"x": "-1", "y": "2"},
+            "points": [point, {"x": "a", "y": "2"}],
+            "fast_points": [point] * 1000 + [{"x": "1"}],
+        }
+
+    def test_it(self):
+        formlike = self._makeOne(self._params())
+        self.assertFalse(formlike.is_valid())
+        store = formlike.error_store
+        self.assertEqual(store.paths, {
+            ("name", ): ["This field is required."],
+            ("center", ): ["negative"],
+            ("points", 1, "x"): ["Enter a whole number."],
+            ("fast_points", 1000, "y"): ["This field is required."],
+            (): ["oops"],
+        })
+        self.assertNotIn("errors", formlike.__dict__)  # the nested shape is not built
+
+    def test_at(self):
+        formlike = self._makeOne(self._params())
+        formlike.is_valid()
+        store = formlike.error_store
+        self.assertEqual(store.at(("points", 1, "x")), ["Enter a whole number."])
+        self.assertEqual(store.at(["points", 0, "x"]), [])
+        self.assertIn(("fast_points", 1000, "y"), store)
+        self.assertEqual(list(store.iter_paths(("fast_points", ))), [
+            (("fast_points", 1000, "y"), ["This field is required."])
+        ])
+        self.assertEqual(store.nested, formlike.errors)
+
+    def test_patch(self):
+        formlike = self._makeOne(self._params())
+        formlike.is_valid()
+        self.assertEqual(len(formlike.error_store), 5)
+        formlike.patch(("points", 1, "x"), "1")
+        self.assertNotIn(("points", 1, "x"), formlike.error_store)
+
+    def test_sequence_errors(self):
+        from django_treeform import TreeForm, Node, Sequence, SequenceNode, iter_error_paths
+
+        def fail(ob):
+            raise forms.ValidationError("failed")
+
+        class F(TreeForm):
+            a = Node(Sequence(PointForm), clean=fail)
+            b = SequenceNode(PointForm, fast=True, batch_clean=fail)
+            c = SequenceNode(PointForm, max_items=1)
+            d = SequenceNode(PointForm, clean=fail)
+            e = SequenceNode(PointForm)
+
+        point = {"x": "1", "y": "2"}
+        formlike = F({"a": [point], "b": [point], "c": [point, point], "d": [{"x": "1"}], "e": [point]})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors["a"], {"__all__": ["failed"], "items": [{}]})
+        self.assertEqual(formlike.errors["c"], {"__all__": ["Ensure this list has at most 1 items (it has 2)."],
+                                                "items": []})
+        self.assertEqual(formlike.errors["e"], [{}])  # no errors of its own
+        self.assertEqual(dict(iter_error_paths(formlike.errors)), formlike.error_store.paths)
+        self.assertEqual(formlike.error_store.paths[("d", )], ["failed"])
+        self.assertEqual(formlike.error_store.paths[("d", 0, "y")], ["This field is required."])
+
+    def test_sequence(self):
+        from django_treeform import Sequence
+
+        def batch_clean(batch):
+            batch.add_error(0, None, "duplicated")
+
+        formlike = Sequence(PointForm, fast=True, batch_clean=batch_clean)([{"x": "1", "y": "2"}, {"x": "1"}])
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.error_store.paths, {(0, ): ["duplicated"], (1, "y"): ["This field is required."]})
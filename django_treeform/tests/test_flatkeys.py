@@ -0,0 +1,96 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class TagsForm(forms.Form):
+    tags = forms.MultipleChoiceField(choices=[("a", "a"), ("b", "b"), ("c", "c")])
+    when = forms.SplitDateTimeField(required=False)
+
+
+class FromQueryDictTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class RouteForm(TreeForm):
+            name = forms.CharField()
+            center = Node(PointForm)
+            points = SequenceNode(PointForm)
+        return RouteForm
+
+    def _callFUT(self, data, **kwargs):
+        return self._getTarget().from_querydict(data, **kwargs)
+
+    def test_formset_style(self):
+        from django.http import QueryDict
+        data = QueryDict(
+            "csrfmiddlewaretoken=x&name=foo&center-x=1&center-y=2&points-TOTAL_FORMS=3"
+            "&points-10-x=5&points-10-y=6&points-2-x=1&points-2-y=2&points-2-z=3&name-x=1"
+        )
+        formlike = self._callFUT(data)
+        self.assertEqual(formlike.params, {
+            "name": "foo",
+            "center": {"x": "1", "y": "2"},
+            "points": [{"x": "1", "y": "2"}, {"x": "5", "y": "6"}],  # ordered by index, gaps left out
+        })
+        self.assertTrue(formlike.is_valid())
+
+    def test_dotted_style(self):
+        data = {"name": "foo", "center.x": "1", "center[y]": "2", "points[1].x": "3", "points.1.y": "4"}
+        formlike = self._callFUT(data, style="dotted")
+        self.assertEqual(formlike.params["center"], {"x": "1", "y": "2"})
+        self.assertEqual(formlike.params["points"], [{"x": "3", "y": "4"}])
+
+    def test_empty_sections(self):
+        formlike = self._callFUT({"name": "foo"})
+        self.assertEqual(formlike.params, {"name": "foo", "center": {}, "points": []})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(sorted(formlike.errors["center"]), ["x", "y"])
+
+    def test_under_a_field(self):
+        formlike = self._callFUT({"name-x": "1", "points-0-x-junk": "2", "points-0-y": "3", "center-x": "4"})
+        self.assertEqual(formlike.params, {"center": {"x": "4"}, "points": [{"y": "3"}]})
+
+    def test_posted_indexes(self):
+        from django_treeform import TreeForm, SequenceNode
+
+        class TrackForm(TreeForm):
+            tracks = SequenceNode(self._getTarget())
+
+        data = {"tracks-4-name": "a", "tracks-4-center-x": "0", "tracks-4-center-y": "0",
+                "tracks-4-points-7-x": "1", "tracks-4-points-7-y": "y",
+                "tracks-4-points-3-x": "2", "tracks-4-points-3-y": "3"}
+        formlike = TrackForm.from_querydict(data)
+        self.assertEqual(formlike.posted_indexes, {("tracks", ): [4], ("tracks", 0, "points"): [3, 7]})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual([formlike.posted_path(path) for path in formlike.error_store.paths],
+                         [("tracks", 4, "points", 7, "y")])
+        self.assertEqual(self._getTarget()({}).posted_path(("points", 1)), ("points", 1))
+
+    def test_max_index(self):
+        self.assertEqual(len(self._callFUT({"points-3-x": "1"}, max_index=3).params["points"]), 1)
+        for key in ("points-4-x", "points-{}-x".format("9" * 100)):
+            with self.assertRaises(ValueError):
+                self._callFUT({key: "1"}, max_index=3)
+
+    def test_multiple_values(self):
+        from django.http import QueryDict
+        from django_treeform import TreeForm, SequenceNode
+
+        class PostForm(TreeForm):
+            entries = SequenceNode(TagsForm)
+
+        data = QueryDict("entries-0-tags=a&entries-0-tags=c&entries-0-when_0=2020-01-02&entries-0-when_1=10:00")
+        formlike = PostForm.from_querydict(data)
+        self.assertEqual(formlike.params["entries"], [{"tags": ["a", "c"], "when_0": "2020-01-02", "when_1": "10:00"}])
+        self.assertTrue(formlike.is_valid())
+        self.assertEqual(formlike.cleaned_data["entries"][0]["tags"], ["a", "c"])
+
+    def test_unknown_style(self):
+        with self.assertRaises(ValueError):
+            self._callFUT({}, style="php")
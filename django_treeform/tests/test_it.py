@@ -95,6 +95,695 @@ class SequenceTests(unittest.TestCase):
         self.assertEqual(formlike.non_form_errors, ["oops"])
 
 
+class FastSequenceTests(SequenceTests):
+    def _makeOne(self, *args, **kwargs):
+        kwargs["fast"] = True
+        return self._getTarget()(*args, **kwargs)
+
+    def test_it_uses_shared_fields(self):
+        from django_treeform import _FastSequence
+        FormLikeClass = self._makeOne(PointForm)
+        formlike = FormLikeClass([{"x": "10", "y": "20"}, {"x": "a", "y": "20"}])
+
+        self.assertIsInstance(formlike, _FastSequence)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.rows[0], (10, 20))
+        self.assertEqual(formlike.errors, [{}, {"x": ["Enter a whole number."]}])
+        self.assertEqual(formlike.cleaned_data, [{"x": 10, "y": 20}, {"y": 20}])
+
+    def test_not_an_object(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from django_treeform import Sequence
+        params = [None, {"x": "1", "y": "2"}, 5]
+        with ThreadPoolExecutor(2) as executor:
+            sequences = [Sequence(PointForm), Sequence(PointForm, fast=True),
+                         Sequence(PointForm, executor=executor), Sequence(PointForm, fast=True, executor=executor)]
+            for wrapper in sequences:
+                formlike = wrapper(params)
+                self.assertFalse(formlike.is_valid())
+                self.assertEqual(formlike.errors, [{"__all__": ["Expected an object."]}, {},
+                                                   {"__all__": ["Expected an object."]}])
+                self.assertEqual(formlike.cleaned_data, [{}, {"x": 1, "y": 2}, {}])
+                self.assertEqual(formlike.n_errors, 2)
+        formlike = Sequence(PointForm, columnar=True)(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.error_store.paths, {(0, ): ["Expected an object."], (2, ): ["Expected an object."]})
+        self.assertEqual({k: list(v) for k, v in formlike.cleaned_data.items()}, {"x": [0, 1, 0], "y": [0, 2, 0]})
+        self.assertEqual(formlike.masks["x"], bytearray(b"\x00\x01\x00"))
+
+    def test_fallback__custom_clean(self):
+        from django_treeform import _Sequence
+
+        class PositivePointForm(PointForm):
+            def clean_x(self):
+                if self.cleaned_data["x"] < 0:
+                    raise forms.ValidationError("negative")
+                return self.cleaned_data["x"]
+
+        FormLikeClass = self._makeOne(PositivePointForm)
+        formlike = FormLikeClass([{"x": "-10", "y": "20"}])
+        self.assertIsInstance(formlike, _Sequence)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors, [{"x": ["negative"]}])
+
+    def test_fallback__custom_init_or_prefix(self):
+        from django_treeform import _Sequence
+
+        class OptionalXForm(PointForm):
+            def __init__(self, *args, **kwargs):
+                super(OptionalXForm, self).__init__(*args, **kwargs)
+                self.fields["x"].required = False
+
+        class PrefixedForm(PointForm):
+            prefix = "p"
+
+        formlike = self._makeOne(OptionalXForm)([{"y": "20"}])
+        self.assertIsInstance(formlike, _Sequence)
+        self.assertTrue(formlike.is_valid())
+
+        formlike = self._makeOne(PrefixedForm)([{"p-x": "10", "p-y": "20"}])
+        self.assertIsInstance(formlike, _Sequence)
+        self.assertTrue(formlike.is_valid())
+
+    def test_in_tree(self):
+        from django_treeform import TreeForm, SequenceNode
+
+        class PointListForm(TreeForm):
+            points = SequenceNode(PointForm, fast=True)
+
+        formlike = PointListForm({"points": [{"x": "10", "y": "20"}, {"x": "1", "y": "2"}]})
+        self.assertTrue(formlike.is_valid())
+        self.assertFalse(formlike.has_error())
+        self.assertEqual(formlike.cleaned_data, {"points": [{"x": 10, "y": 20}, {"x": 1, "y": 2}]})
+        self.assertEqual(formlike.errors, {"points": [{}, {}]})
+
+
+class SequenceStreamTests(unittest.TestCase):
+    def _makeOne(self, *args, **kwargs):
+        from django_treeform import Sequence
+        return Sequence(*args, **kwargs)
+
+    def _params(self):
+        yield {"x": "10", "y": "20"}
+        yield {"x": "aaa", "y": "20"}
+        yield {"x": "30", "y": "40"}
+
+    def test_it(self):
+        stream = self._makeOne(PointForm).iter_validate(self._params())
+        result = list(stream)
+
+        self.assertEqual([(i, cleaned_data) for i, cleaned_data, _ in result],
+                         [(0, {"x": 10, "y": 20}), (1, {"y": 20}), (2, {"x": 30, "y": 40})])
+        self.assertEqual([errors for _, _, errors in result],
+                         [{}, {"x": ["Enter a whole number."]}, {}])
+        self.assertTrue(stream.has_error())
+
+    def test_it__fast(self):
+        stream = self._makeOne(PointForm, fast=True).iter_validate(self._params())
+        self.assertEqual([errors for _, _, errors in stream],
+                         [{}, {"x": ["Enter a whole number."]}, {}])
+
+    def test_tree_items(self):
+        from django_treeform import TreeForm, Node
+
+        class LabeledPointForm(TreeForm):
+            name = forms.CharField()
+            point = Node(PointForm)
+
+        params = [{"name": "a", "point": {"x": "1", "y": "2"}}, {"name": "b", "point": {"x": "3", "y": "4"}}]
+        stream = self._makeOne(LabeledPointForm).iter_validate(iter(params))
+        self.assertTrue(stream.is_valid())
+        self.assertEqual(stream.n_invalid, 0)
+
+    def test_reducer(self):
+        def reducer(total, cleaned_data, errors):
+            return total + cleaned_data.get("x", 0)
+
+        def finalize(total):
+            if total > 30:
+                raise forms.ValidationError("too large")
+
+        stream = self._makeOne(PointForm).iter_validate(
+            self._params(), reducer=reducer, initial=0, finalize=finalize
+        )
+        self.assertFalse(stream.is_valid())
+        self.assertEqual(stream.value, 40)
+        self.assertEqual(stream.n_items, 3)
+        self.assertEqual(stream.non_form_errors, ["too large"])
+
+
+class FailFastTests(unittest.TestCase):
+    def _params(self):
+        return [{"x": "a", "y": "20"}, {"x": "b", "y": "c"}, {"x": "10", "y": "d"}]
+
+    def test_sequence(self):
+        from django_treeform import Sequence
+        formlike = Sequence(PointForm, fail_fast=True)(self._params())
+
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, [1, 2])
+        self.assertEqual(formlike.errors, [{"x": ["Enter a whole number."]}, None, None])
+        self.assertEqual(formlike.cleaned_data, [{"y": 20}, None, None])
+
+    def test_generator(self):
+        from django_treeform import Sequence
+        for fast in (False, True):
+            formlike = Sequence(PointForm, fast=fast, fail_fast=True)(params for params in self._params())
+            self.assertFalse(formlike.is_valid())
+            self.assertEqual(formlike.skipped, [1, 2])
+
+    def test_sequence__fast(self):
+        from django_treeform import Sequence
+        formlike = Sequence(PointForm, fast=True, max_errors=2)(self._params())
+
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, [2])
+        self.assertEqual(len(formlike.row_errors), 2)
+        self.assertEqual(formlike.errors[2], None)
+
+    def test_node(self):
+        from django_treeform import Node, Sequence
+        formlike = Node(Sequence(PointForm), max_errors=2)("points")({"points": self._params()})
+
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors[2], None)
+
+    def test_treeform(self):
+        from django_treeform import TreeForm, SequenceNode
+
+        class PointListForm(TreeForm):
+            fail_fast = True
+            name = forms.CharField()
+            points = SequenceNode(PointForm)
+            others = SequenceNode(PointForm)
+
+        params = {"name": "foo", "points": self._params(), "others": self._params()}
+        formlike = PointListForm(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, ["others"])
+        self.assertEqual(formlike.errors["points"][1:], [None, None])
+        self.assertEqual(formlike.errors["others"], None)
+
+        formlike = PointListForm(params, max_errors=100)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, [])
+        self.assertNotIn(None, formlike.errors["others"])
+
+    def test_clean_hook_is_skipped(self):
+        from django_treeform import Sequence
+
+        def clean(self):
+            raise AssertionError("not called")
+
+        formlike = Sequence(PointForm, clean=clean, fail_fast=True)(self._params())
+        self.assertFalse(formlike.is_valid())
+
+
+class ParallelSequenceTests(unittest.TestCase):
+    def _makeOne(self, *args, **kwargs):
+        from django_treeform import Sequence
+        return Sequence(*args, **kwargs)
+
+    def _params(self):
+        return [{"x": str(i), "y": "20"} if i != 5 else {"x": "a", "y": "20"} for i in range(23)]
+
+    def _check(self, formlike):
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(len(formlike.cleaned_data), 23)
+        self.assertEqual(formlike.cleaned_data[4], {"x": 4, "y": 20})
+        self.assertEqual(formlike.cleaned_data[5], {"y": 20})
+        self.assertEqual(formlike.errors[5], {"x": ["Enter a whole number."]})
+        self.assertEqual([i for i, e in enumerate(formlike.errors) if e], [5])
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(2) as executor:
+            self._check(self._makeOne(PointForm, executor=executor, chunksize=4)(self._params()))
+            self._check(self._makeOne(PointForm, fast=True, executor=executor, chunksize=4)(self._params()))
+
+    def test_processes(self):
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(2) as executor:
+            self._check(self._makeOne(PointForm, fast=True, executor=executor, chunksize=4)(self._params()))
+
+    def test_clean_runs_in_parent(self):
+        from concurrent.futures import ThreadPoolExecutor
+        called = []
+
+        def clean(self):
+            called.append(len(self.cleaned_data))
+
+        with ThreadPoolExecutor(2) as executor:
+            formlike = self._makeOne(PointForm, clean=clean, executor=executor, chunksize=4)(self._params())
+            formlike.is_valid()
+        self.assertEqual(called, [23])
+
+    def test_fail_fast(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(2) as executor:
+            formlike = self._makeOne(PointForm, fail_fast=True, executor=executor, chunksize=4)(self._params())
+            self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, list(range(6, 23)))
+
+    def test_tree_items(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from django_treeform import TreeForm, Node
+
+        class LabeledPointForm(TreeForm):
+            name = forms.CharField()
+            point = Node(PointForm)
+
+        params = [{"name": "a", "point": item} for item in self._params()]
+        with ThreadPoolExecutor(2) as executor:
+            formlike = self._makeOne(LabeledPointForm, executor=executor, chunksize=4)(params)
+            self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.n_errors, 1)  # the empty entries of the valid fields are not counted
+        self.assertEqual(list(formlike.error_store), [(5, "point", "x")])
+        serial = self._makeOne(LabeledPointForm)(params)
+        self.assertFalse(serial.is_valid())
+        self.assertEqual(formlike.errors, serial.errors)  # {"name": [], "point": {}} for the valid items
+        self.assertEqual(formlike.cleaned_data, serial.cleaned_data)
+
+    def test_tree_items_batch_clean(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from django_treeform import TreeForm, Node
+
+        class LabeledPointForm(TreeForm):
+            name = forms.CharField()
+            point = Node(PointForm)
+
+        def batch_clean(batch):
+            batch.add_error(0, "name", "duplicated")
+
+        params = [{"name": "a", "point": {"x": "1", "y": "2"}}] * 3
+        with ThreadPoolExecutor(2) as executor:
+            formlike = self._makeOne(LabeledPointForm, executor=executor, batch_clean=batch_clean)(params)
+            self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.error_store.paths, {(0, "name"): ["duplicated"]})
+        self.assertEqual(formlike.cleaned_data[0], {"point": {"x": 1, "y": 2}})
+
+        def unknown(batch):
+            batch.add_error(0, "point", "not a field")
+
+        with ThreadPoolExecutor(2) as executor:
+            with self.assertRaises(ValueError):
+                self._makeOne(LabeledPointForm, executor=executor, batch_clean=unknown)(params).is_valid()
+
+
+class PatchTests(unittest.TestCase):
+    def _makeOne(self, params, fast=False):
+        from django_treeform import TreeForm, SequenceNode, Node
+
+        class ItemForm(forms.Form):
+            name = forms.CharField(max_length=3)
+
+        def clean(self):
+            if self.has_error():
+                return
+            if len(set(row["name"] for row in self.cleaned_data)) != len(self.cleaned_data):
+                raise forms.ValidationError("duplicated")
+
+        class NestedForm(TreeForm):
+            title = forms.CharField()
+
+            class a(TreeForm):
+                point = Node(PointForm)
+                items = SequenceNode(ItemForm, clean=clean, fast=fast)
+
+        return NestedForm(params)
+
+    def _params(self):
+        return {"title": "t", "a": {"point": {"x": "1", "y": "2"}, "items": [{"name": "A"}, {"name": "B"}]}}
+
+    def test_leaf(self):
+        formlike = self._makeOne(self._params())
+        self.assertTrue(formlike.is_valid())
+        point = formlike.nodes[0].form.nodes[0]
+        items = formlike.nodes[0].form.nodes[1].form
+
+        self.assertFalse(formlike.patch(("a", "items", 1, "name"), "toolong"))
+        self.assertEqual(formlike.errors["a"]["items"][1],
+                         {"name": ["Ensure this value has at most 3 characters (it has 7)."]})
+        self.assertEqual(formlike.cleaned_data["a"]["items"], [{"name": "A"}, {}])
+        self.assertIs(point, formlike.nodes[0].form.nodes[0])
+        self.assertIs(items.forms[0], formlike.nodes[0].form.nodes[1].form.forms[0])
+
+        self.assertTrue(formlike.patch(("a", "items", 1, "name"), "C"))
+        self.assertEqual(formlike.cleaned_data["a"]["items"], [{"name": "A"}, {"name": "C"}])
+        self.assertEqual(self._params()["a"]["items"][1], {"name": "B"})
+
+    def test_ancestors_clean(self):
+        for fast in (False, True):
+            formlike = self._makeOne(self._params(), fast=fast)
+            self.assertTrue(formlike.is_valid())
+            self.assertFalse(formlike.patch(("a", "items", 1), {"name": "A"}))
+            self.assertEqual(formlike.errors["a"]["items"], {"__all__": ["duplicated"], "items": [{}, {}]})
+            self.assertEqual(formlike.nodes[0].form.nodes[1].form.non_form_errors, ["duplicated"])
+            self.assertTrue(formlike.patch(("a", "items", 1, "name"), "B"))
+            self.assertFalse(formlike.has_error())
+
+    def test_field(self):
+        formlike = self._makeOne(self._params())
+        self.assertTrue(formlike.is_valid())
+        self.assertFalse(formlike.patch(("title", ), ""))
+        self.assertEqual(formlike.errors["title"], ["This field is required."])
+        self.assertFalse(formlike.patch(("a", "point"), {"x": "10", "y": "20"}))
+        self.assertEqual(formlike.errors["title"], ["This field is required."])
+        self.assertTrue(formlike.patch(("title", ), "x"))
+        self.assertEqual(formlike.cleaned_data["a"]["point"], {"x": 10, "y": 20})
+
+    def test_unknown_path(self):
+        formlike = self._makeOne(self._params())
+        self.assertTrue(formlike.is_valid())
+        with self.assertRaises(KeyError):
+            formlike.patch(("b", "c"), "x")
+
+
+class ErrorCountTests(unittest.TestCase):
+    def _makeOne(self, params, fast=False):
+        from django_treeform import TreeForm, SequenceNode
+
+        class PointListForm(TreeForm):
+            name = forms.CharField()
+
+            class pair(TreeForm):
+                left = SequenceNode(PointForm)
+                right = SequenceNode(PointForm, fast=fast)
+
+            def clean(self):
+                if self.has_error():
+                    return
+                raise forms.ValidationError("oops")
+
+        return PointListForm(params)
+
+    def test_counted_bottom_up(self):
+        for fast in (False, True):
+            params = {"name": "", "pair": {"left": [{"x": "a", "y": "b"}], "right": [{"x": "1", "y": "b"}]}}
+            formlike = self._makeOne(params, fast=fast)
+            self.assertFalse(formlike.is_valid())
+            self.assertEqual(formlike.n_errors, 4)
+            self.assertEqual(formlike.nodes[0].n_errors, 3)
+            self.assertEqual(formlike.nodes[0].form.nodes[1].n_errors, 1)
+            self.assertNotIn("errors", formlike.__dict__)
+            self.assertNotIn("__all__", formlike.errors)
+
+    def test_clean_hook(self):
+        params = {"name": "foo", "pair": {"left": [], "right": []}}
+        formlike = self._makeOne(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.n_errors, 1)
+        self.assertEqual(formlike.errors["__all__"], ["oops"])
+
+    def test_patch(self):
+        params = {"name": "", "pair": {"left": [{"x": "a", "y": "b"}], "right": []}}
+        formlike = self._makeOne(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.n_errors, 3)
+        formlike.patch(("pair", "left", 0, "x"), "1")
+        self.assertEqual(formlike.n_errors, 2)
+        formlike.patch(("name", ), "foo")
+        formlike.patch(("pair", "left", 0), {"x": "1", "y": "2"})
+        self.assertEqual(formlike.n_errors, 1)
+        self.assertEqual(formlike.non_form_errors, ["oops"])
+
+
+class LazyTreeTests(unittest.TestCase):
+    def _makeOne(self, params, **kwargs):
+        from django_treeform import TreeForm, SequenceNode, Node
+        built = []
+
+        class CountedPointForm(PointForm):
+            def __init__(self, *args, **kwargs):
+                built.append(args[0])
+                super(CountedPointForm, self).__init__(*args, **kwargs)
+
+        class NestedForm(TreeForm):
+            title = forms.CharField()
+
+            class a(TreeForm):
+                left = Node(CountedPointForm)
+                right = Node(CountedPointForm)
+            points = SequenceNode(CountedPointForm)
+
+        return NestedForm(params, **kwargs), built
+
+    def _params(self):
+        return {
+            "title": "t",
+            "a": {"left": {"x": "1", "y": "2"}, "right": {"x": "a", "y": "2"}},
+            "points": [{"x": "a", "y": "2"}, {"x": "b", "y": "2"}],
+        }
+
+    def test_nothing_is_built_until_validation(self):
+        formlike, built = self._makeOne(self._params())
+        self.assertEqual(built, [])
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(len(built), 4)
+
+    def test_fail_fast_does_not_build_skipped(self):
+        formlike, built = self._makeOne(self._params(), fail_fast=True)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(len(built), 2)
+        self.assertEqual(formlike.errors["points"], None)
+
+    def test_validate_paths(self):
+        formlike, built = self._makeOne(self._params())
+        self.assertTrue(formlike.validate_paths([("a", "left"), ("title", )]))
+        self.assertEqual(built, [{"x": "1", "y": "2"}])
+        self.assertEqual(formlike.cleaned_data, {"title": "t", "a": {"left": {"x": 1, "y": 2}}})
+        self.assertEqual(formlike.errors, {"title": [], "a": {"left": {}}})
+
+    def test_validate_paths__failure(self):
+        formlike, built = self._makeOne(self._params())
+        self.assertFalse(formlike.validate_paths([("points", )]))
+        self.assertEqual(len(built), 2)
+        self.assertEqual(list(formlike.errors.keys()), ["points"])
+        self.assertTrue(formlike.has_error())
+
+    def test_validate_paths__unknown(self):
+        formlike, _ = self._makeOne(self._params())
+        with self.assertRaises(KeyError):
+            formlike.validate_paths([("b", )])
+
+
+class AsyncValidationTests(unittest.TestCase):
+    def _makeOne(self, hook):
+        from django_treeform import TreeForm, Node, Sequence
+
+        class PointTreeForm(TreeForm):
+            point = Node(PointForm, clean=hook)
+
+        class PointListForm(TreeForm):
+            left = Node(PointForm, clean=hook)
+            right = Node(PointForm, clean=hook)
+            points = Node(Sequence(PointTreeForm))
+
+            async def clean(self):
+                if self.has_error():
+                    return
+                if self.cleaned_data["left"]["x"] > self.cleaned_data["right"]["x"]:
+                    raise forms.ValidationError("oops")
+        return PointListForm
+
+    def _params(self, n=3):
+        point = {"x": "1", "y": "2"}
+        return {"left": point, "right": point, "points": [{"point": point} for _ in range(n)]}
+
+    def _hook(self, state, error_if=None):
+        import asyncio
+
+        async def hook(node):
+            state["running"] += 1
+            state["max"] = max(state["max"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+            if error_if is not None and node.cleaned_data["x"] == error_if:
+                raise forms.ValidationError("ng")
+        return hook
+
+    def test_concurrently(self):
+        import asyncio
+        state = {"running": 0, "max": 0}
+        formlike = self._makeOne(self._hook(state))(self._params())
+        self.assertTrue(asyncio.run(formlike.ais_valid()))
+        self.assertEqual(state["max"], 5)
+        self.assertEqual(formlike.errors["points"][0], {"point": {}})
+
+    def test_concurrency_limit(self):
+        import asyncio
+        state = {"running": 0, "max": 0}
+        formlike = self._makeOne(self._hook(state))(self._params())
+        self.assertTrue(asyncio.run(formlike.ais_valid(concurrency=2)))
+        self.assertEqual(state["max"], 2)
+
+    def test_failure(self):
+        import asyncio
+        state = {"running": 0, "max": 0}
+        params = self._params()
+        params["right"] = {"x": "0", "y": "2"}
+        formlike = self._makeOne(self._hook(state, error_if=0))(params)
+        self.assertFalse(asyncio.run(formlike.ais_valid()))
+        self.assertEqual(formlike.errors["right"], {"__all__": ["ng"]})
+        self.assertNotIn("__all__", formlike.errors)
+
+        formlike = self._makeOne(self._hook(state))(params)
+        self.assertFalse(asyncio.run(formlike.ais_valid()))
+        self.assertEqual(formlike.errors["__all__"], ["oops"])
+
+    def test_fail_fast(self):
+        import asyncio
+        state = {"running": 0, "max": 0}
+        formlike = self._makeOne(self._hook(state, error_if=1))(self._params(), fail_fast=True)
+        self.assertFalse(asyncio.run(formlike.ais_valid()))
+        self.assertEqual(state["max"], 1)
+        self.assertEqual(formlike.skipped, ["right", "points"])
+
+    def test_sync_api_rejects_async_hooks(self):
+        state = {"running": 0, "max": 0}
+        formlike = self._makeOne(self._hook(state))(self._params())
+        with self.assertRaises(TypeError):
+            formlike.is_valid()
+
+
+class BatchCleanTests(unittest.TestCase):
+    def _makeOne(self, batch_clean, **kwargs):
+        from django_treeform import Sequence
+        return Sequence(PointForm, batch_clean=batch_clean, **kwargs)
+
+    def _params(self):
+        return [{"x": "10", "y": "20"}, {"x": "11", "y": "20"}, {"x": "x", "y": "20"}, {"x": "12", "y": "20"}]
+
+    def _batch_clean(self, queries):
+        known = {10, 12}
+
+        def batch_clean(batch):
+            queries.append([i for i, _ in batch.rows])  # one bulk query for the whole sequence
+            for i, cleaned_data in batch.rows:
+                if "x" in cleaned_data and cleaned_data["x"] not in known:
+                    batch.add_error(i, "x", "not found")
+        return batch_clean
+
+    def _check(self, formlike, queries):
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(queries, [[0, 1, 2, 3]])
+        self.assertEqual(formlike.errors[0], {})
+        self.assertEqual(formlike.errors[1], {"x": ["not found"]})
+        self.assertEqual(formlike.errors[2], {"x": ["Enter a whole number."]})
+        self.assertEqual(formlike.cleaned_data[1], {"y": 20})
+        self.assertEqual(formlike.n_errors, 2)
+
+    def test_it(self):
+        queries = []
+        self._check(self._makeOne(self._batch_clean(queries))(self._params()), queries)
+
+    def test_fast(self):
+        queries = []
+        self._check(self._makeOne(self._batch_clean(queries), fast=True)(self._params()), queries)
+
+    def test_treeform_items(self):
+        from django_treeform import TreeForm, Node, Sequence
+
+        class ItemForm(TreeForm):
+            x = forms.IntegerField()
+            point = Node(PointForm)
+
+        def batch_clean(batch):
+            batch.add_error(0, "x", "not found")
+            batch.add_error(1, None, "duplicated")
+
+        params = [{"x": "1", "point": {"x": "1", "y": "2"}}] * 2
+        formlike = Sequence(ItemForm, batch_clean=batch_clean)(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors[0], {"x": ["not found"], "point": {}})
+        self.assertEqual(formlike.errors[1], {"x": [], "point": {}, "__all__": ["duplicated"]})
+        self.assertEqual(formlike.cleaned_data[0]["x"], None)
+        self.assertEqual(formlike.n_errors, 2)
+
+    def test_sequence_error(self):
+        def batch_clean(batch):
+            raise forms.ValidationError("too many")
+
+        formlike = self._makeOne(batch_clean)(self._params()[:2])
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.non_form_errors, ["too many"])
+        self.assertEqual(formlike.errors, [{}, {}])
+
+    def test_patch(self):
+        queries = []
+        formlike = self._makeOne(self._batch_clean(queries), fast=True)(self._params())
+        formlike.is_valid()
+        self.assertFalse(formlike.patch((2, "x"), "10"))
+        self.assertEqual(queries, [[0, 1, 2, 3], [2]])
+        self.assertTrue(formlike.patch((1, "x"), "12"))
+        self.assertEqual(formlike.errors[1], {})
+
+    def test_async(self):
+        import asyncio
+        queries = []
+
+        async def batch_clean(batch):
+            await asyncio.sleep(0)
+            self._batch_clean(queries)(batch)
+
+        formlike = self._makeOne(batch_clean)(self._params())
+        self.assertFalse(asyncio.run(formlike.ais_valid()))
+        self.assertEqual(formlike.errors[1], {"x": ["not found"]})
+        with self.assertRaises(TypeError):
+            self._makeOne(batch_clean)(self._params()).is_valid()
+
+
+class CompactNodeTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class PointPairForm(TreeForm):
+            name = forms.CharField()
+            left = Node(PointForm)
+            right = Node(PointForm)
+            points = SequenceNode(PointForm)
+        return PointPairForm
+
+    def _makeOne(self, params):
+        return self._getTarget()(params)
+
+    def _params(self):
+        point = {"x": "1", "y": "2"}
+        return {"name": "foo", "left": point, "right": point, "points": [point]}
+
+    def test_slots(self):
+        formlike = self._makeOne(self._params())
+        self.assertTrue(formlike.is_valid())
+        for node in formlike.nodes:
+            self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(formlike.nodes[2].form, "__dict__"))
+
+    def test_metadata_is_shared(self):
+        formclass = self._getTarget()
+        x = formclass(self._params())
+        y = formclass(self._params())
+        self.assertIs(x.nodes[0].spec, y.nodes[0].spec)
+        self.assertIs(x.nodes[2].form.wrapper, y.nodes[2].form.wrapper)
+        self.assertEqual(x.nodes[0].keyname, "left")
+
+    def test_error_lists_are_allocated_on_first_error(self):
+        formlike = self._makeOne(self._params())
+        formlike.is_valid()
+        self.assertIsNone(formlike.nodes[0]._self_errors)
+        self.assertIsNone(formlike.nodes[2].form._non_form_errors)
+        self.assertEqual(formlike.field_errors, {})
+        self.assertEqual(formlike.errors["name"], [])
+        self.assertEqual(formlike.nodes[2].form.non_form_errors, [])
+
+        params = self._params()
+        params["name"] = ""
+        formlike = self._makeOne(params)
+        formlike.is_valid()
+        self.assertEqual(formlike.errors["name"], ["This field is required."])
+        self.assertEqual(formlike.n_errors, 1)
+
+
 class NodeTests(unittest.TestCase):
     def _getTarget(self):
         from django_treeform import Node
@@ -478,3 +1167,128 @@ class TreeFormTests5(unittest.TestCase):
         }]
         form = Sequence(PersonForm)(params)
         self.assertTrue(form.is_valid())
+
+
+class PlanTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm
+        return TreeForm
+
+    def _makeOne(self):
+        from django_treeform import Node, SequenceNode
+
+        class ItemForm(forms.Form):
+            name = forms.CharField()
+
+        class PersonForm(self._getTarget()):
+            id = forms.IntegerField()
+            name = forms.CharField()
+            point = Node(PointForm)
+            items = SequenceNode(ItemForm)
+        return PersonForm
+
+    def test_compiled_once(self):
+        PersonForm = self._makeOne()
+        self.assertEqual(PersonForm.plan.keynames, ("id", "name", "point", "items"))
+        self.assertEqual([k for k, _ in PersonForm.plan.fields], ["id", "name"])
+
+    def test_it(self):
+        PersonForm = self._makeOne()
+        params = {"id": "1", "name": "foo", "point": {"x": "1", "y": "2"}, "items": [{"name": "A"}]}
+        formlike = PersonForm(params)
+        self.assertTrue(formlike.is_valid())
+        expected = {"id": 1, "name": "foo", "point": {"x": 1, "y": 2}, "items": [{"name": "A"}]}
+        self.assertEqual(formlike.cleaned_data, expected)
+        self.assertEqual(formlike.errors, {"id": [], "name": [], "point": {}, "items": [{}]})
+
+    def test_failure_in_clean__multiple(self):
+        class PersonForm(self._getTarget()):
+            id = forms.IntegerField()
+
+            def clean(self):
+                raise forms.ValidationError("oops")
+
+        formlike = PersonForm({"id": "1"})
+        self.assertFalse(formlike.is_valid())
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors, {"id": [], "__all__": ["oops"]})
+
+    def test_inheritance(self):
+        from django_treeform import Node
+        PersonForm = self._makeOne()
+
+        class EmployeeForm(PersonForm):
+            name = forms.CharField(max_length=3)
+            items = None
+            boss = Node(PersonForm)
+
+        self.assertEqual(EmployeeForm.plan.keynames, ("id", "name", "point", "boss"))
+        self.assertEqual(EmployeeForm.plan.field_map["name"].max_length, 3)
+        self.assertEqual([f.args[0].keyname for f in EmployeeForm.factories], ["id", "name", "point", "boss"])
+        self.assertEqual(PersonForm.plan.keynames, ("id", "name", "point", "items"))
+
+    def test_factories_are_ordered(self):
+        PersonForm = self._makeOne()
+        self.assertIsInstance(PersonForm.factories, tuple)
+        self.assertEqual([f.args[0].keyname for f in PersonForm.factories], ["id", "name", "point", "items"])
+
+    def test_hand_written_field_factory(self):
+        from django_treeform import OneField
+
+        class NoteForm(self._getTarget()):
+            factories = [OneField(forms.CharField())("note")]
+
+        formlike = NoteForm({"note": ""})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors, {"note": ["This field is required."]})
+        self.assertEqual(formlike.error_store.paths, {("note", ): ["This field is required."]})
+
+    def test_declaration_order(self):
+        from django_treeform import TreeForm, Node
+
+        class LabeledPointForm(TreeForm):
+            p = Node(PointForm)
+            name = forms.CharField()
+
+        formlike = LabeledPointForm({"p": {"x": "1", "y": "a"}, "name": "foo"})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(list(formlike.errors), ["p", "name"])
+        self.assertEqual(list(formlike.cleaned_data), ["p", "name"])
+        self.assertEqual(LabeledPointForm.plan.keynames, ("p", "name"))
+
+    def test_cheap_first_under_fail_fast(self):
+        from django_treeform import Node, OneField, SequenceNode
+
+        class PointsForm(self._getTarget()):
+            fail_fast = True
+            points = SequenceNode(PointForm)
+            left = Node(PointForm)
+            note = OneField(forms.CharField(), cost=50)
+            name = forms.CharField()
+
+        params = {"points": [{"x": "1", "y": "2"}], "left": {"x": "x", "y": "2"}, "name": "foo", "note": "x"}
+        formlike = PointsForm(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, ["points"])
+        self.assertEqual(list(formlike.errors), ["points", "left", "note", "name"])  # in declaration order
+
+        params["name"] = ""
+        formlike = PointsForm(params)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, ["note", "left", "points"])
+
+        formlike = PointsForm(params, max_errors=100)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, [])
+
+    def test_cost_hint(self):
+        from django_treeform import Node, SequenceNode
+
+        class PointsForm(self._getTarget()):
+            fail_fast = True
+            left = Node(PointForm)
+            points = SequenceNode(PointForm, cost=0)
+
+        formlike = PointsForm({"points": [{"x": "x", "y": "2"}], "left": {"x": "1", "y": "2"}})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.skipped, ["left"])
@@ -0,0 +1,81 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class DecodeTests(unittest.TestCase):
+    def _callFUT(self, text, schema):
+        from django_treeform.jsonload import loads
+        return loads(text, schema)
+
+    def test_unknown_keys_are_skipped(self):
+        text = '{"a": 1, "junk": {"x": [1, "]}", {"y": null}]}, "b": [{"c": "d", "e": 2}], "z": "}"}'
+        self.assertEqual(self._callFUT(text, {"a": None, "b": [{"c": None}]}), {"a": 1, "b": [{"c": "d"}]})
+
+    def test_anything(self):
+        text = '{"a": {"b": [1, 2.5, true, null]}}'
+        self.assertEqual(self._callFUT(text, None), {"a": {"b": [1, 2.5, True, None]}})
+        self.assertEqual(self._callFUT(text, {"a": None}), {"a": {"b": [1, 2.5, True, None]}})
+
+    def test_shape_mismatch_is_decoded_as_is(self):
+        self.assertEqual(self._callFUT('{"a": "x"}', {"a": {"b": None}}), {"a": "x"})
+
+    def test_invalid(self):
+        for text in ['{"a": 1', '{"a": 1,}', '{"junk": [1, 2}', '{"a": 1} 2', '{"junk": "x}',
+                     '{"junk": [1,,2]}', '{"junk": {"k" 1 2}}', '{"junk": [1 2]}', '{"junk": tru}',
+                     '{"junk": "\\q"}', '{"junk": {"k": 1,}}', '{"junk": [1,]}']:
+            with self.assertRaises(ValueError):
+                self._callFUT(text, {"a": None})
+
+
+class FromJSONTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, SequenceNode, Node
+
+        class PointListForm(TreeForm):
+            name = forms.CharField()
+            center = Node(PointForm)
+            points = SequenceNode(PointForm)
+        return PointListForm
+
+    def test_it(self):
+        text = b'{"name": "foo", "center": {"x": 1, "y": 2, "z": 3}, "points": [{"x": 1, "y": 2}], "big": [1, 2]}'
+        formlike = self._getTarget().from_json(text)
+        self.assertNotIn("big", formlike.params)
+        self.assertEqual(formlike.params["center"], {"x": 1, "y": 2})
+        self.assertTrue(formlike.is_valid())
+        self.assertEqual(formlike.cleaned_data["points"], [{"x": 1, "y": 2}])
+        self.assertEqual(formlike.error_offsets(), [])
+
+    def test_error_offsets(self):
+        import io
+        text = '{"name": "あ", "center": {"x": 1, "y": "b"}, "points": [{"x": 1, "y": 2}, {"x": "a"}]}'
+        data = text.encode("utf-8")
+        formlike = self._getTarget().from_json(io.BytesIO(data))
+        self.assertFalse(formlike.is_valid())
+        rows = {path: (offset, messages) for path, offset, messages in formlike.error_offsets()}
+        self.assertEqual(sorted(rows), [("center", "y"), ("points", 1, "x"), ("points", 1, "y")])
+        self.assertEqual(data[rows[("center", "y")][0]:].split(b"}")[0], b'"b"')
+        self.assertEqual(data[rows[("points", 1, "x")][0]:].split(b"}")[0], b'"a"')
+        self.assertIsNone(rows[("points", 1, "y")][0])  # missing in the document
+        self.assertEqual(rows[("center", "y")][1], ["Enter a whole number."])
+
+    def test_offsets(self):
+        from django_treeform.jsonload import JSONSource
+        text = '{"a": "\u3042\u3044", "b": [1, {"c": "\u3046"}], "d": 2}'
+        paths = [("a", ), ("b", 1, "c"), ("d", ), ("e", )]
+        for encoding in ("utf-8", "utf-16"):
+            source = JSONSource.read(text.encode(encoding))
+            positions = {("a", ): text.index('"\u3042'), ("b", 1, "c"): text.index('"\u3046'), ("d", ): len(text) - 2}
+            expected = {path: len(text[:pos].encode(encoding)) for path, pos in positions.items()}
+            self.assertEqual(source.offsets(paths), expected)
+
+    def test_schema(self):
+        from django_treeform.jsonload import schema_of
+        self.assertEqual(schema_of(self._getTarget()),
+                         {"name": None, "center": {"x": None, "y": None}, "points": [{"x": None, "y": None}]})
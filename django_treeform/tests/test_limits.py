@@ -0,0 +1,111 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class _CountingForm(PointForm):
+    built = []
+
+    def __init__(self, *args, **kwargs):
+        self.built.append(1)
+        super(_CountingForm, self).__init__(*args, **kwargs)
+
+
+class MaxItemsTests(unittest.TestCase):
+    def _makeOne(self, formclass, **kwargs):
+        from django_treeform import Sequence
+        return Sequence(formclass, max_items=2, **kwargs)
+
+    def _params(self, n):
+        return [{"x": "1", "y": "2"}] * n
+
+    def test_it(self):
+        del _CountingForm.built[:]
+        formlike = self._makeOne(_CountingForm)(self._params(3))
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.non_form_errors, ["Ensure this list has at most 2 items (it has 3)."])
+        self.assertEqual(formlike.errors, [])
+        self.assertEqual(_CountingForm.built, [])  # rejected before any form is built
+
+        self.assertTrue(self._makeOne(_CountingForm)(self._params(2)).is_valid())
+
+    def test_fast(self):
+        formlike = self._makeOne(PointForm, fast=True)(self._params(3))
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.error_store.paths, {(): ["Ensure this list has at most 2 items (it has 3)."]})
+
+    def test_iterator(self):
+        for fast in (False, True):
+            items = iter(self._params(5))
+            formlike = self._makeOne(PointForm, fast=fast)(items)
+            self.assertFalse(formlike.is_valid())
+            self.assertEqual(formlike.non_form_errors, ["Ensure this list has at most 2 items (it has more)."])
+            self.assertEqual(len(list(items)), 2)  # read up to max_items + 1
+            formlike = self._makeOne(PointForm, fast=fast)(iter(self._params(2)))
+            self.assertTrue(formlike.is_valid())
+            self.assertEqual(len(formlike.cleaned_data), 2)
+
+    def test_in_tree(self):
+        from django_treeform import TreeForm, SequenceNode
+
+        class PointListForm(TreeForm):
+            points = SequenceNode(PointForm, max_items=2)
+
+        formlike = PointListForm({"points": self._params(3)})
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors, {"points": {"__all__": ["Ensure this list has at most 2 items (it has 3)."],
+                                                      "items": []}})
+        self.assertEqual(formlike.n_errors, 1)
+
+    def test_stream(self):
+        stream = self._makeOne(PointForm).iter_validate(iter(self._params(5)))
+        self.assertFalse(stream.is_valid())
+        self.assertEqual(stream.n_items, 2)
+        self.assertEqual(stream.non_form_errors, ["Ensure this list has at most 2 items (it has more)."])
+
+
+class TreeLimitTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class PointListForm(TreeForm):
+            center = Node(_CountingForm)
+            points = SequenceNode(_CountingForm)
+        return PointListForm
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTarget()(*args, **kwargs)
+
+    def _params(self, n):
+        return {"center": {"x": "1", "y": "2"}, "points": [{"x": "1", "y": "2"}] * n}
+
+    def test_max_total_nodes(self):
+        del _CountingForm.built[:]
+        formlike = self._makeOne(self._params(1000), max_total_nodes=100)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.errors,
+                         {"__all__": ["Ensure the data has at most 100 values (it has at least 1005)."]})
+        self.assertEqual(_CountingForm.built, [])
+
+        self.assertTrue(self._makeOne(self._params(10), max_total_nodes=100).is_valid())
+
+    def test_max_depth(self):
+        params = self._params(1)
+        params["points"][0] = {"x": "1", "y": {"a": {"b": {}}}}
+        formlike = self._makeOne(params, max_depth=3)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(formlike.non_form_errors, ["Ensure the data is nested at most 3 levels deep."])
+        self.assertTrue(self._makeOne(self._params(1), max_depth=3).is_valid())
+
+    def test_declared(self):
+        import asyncio
+
+        class LimitedForm(self._getTarget()):
+            max_depth = 2
+
+        self.assertFalse(asyncio.run(LimitedForm(self._params(1)).ais_valid()))
@@ -0,0 +1,153 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
+
+
+class Order(models.Model):
+    name = models.CharField(max_length=32)
+
+    class Meta:
+        app_label = "django_treeform_tests"
+
+
+class Item(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    name = models.CharField(max_length=32)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        app_label = "django_treeform_tests"
+
+
+class Address(models.Model):
+    order = models.OneToOneField(Order, on_delete=models.CASCADE)
+    city = models.CharField(max_length=32)
+
+    class Meta:
+        app_label = "django_treeform_tests"
+
+
+class ItemForm(forms.Form):
+    name = forms.CharField()
+    quantity = forms.IntegerField()
+
+
+class AddressForm(forms.Form):
+    city = forms.CharField()
+
+
+def _inserts(queries):
+    return [q for q in queries if q["sql"].startswith("INSERT")]
+
+
+class SaveBulkTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            for model in (Order, Item, Address):
+                editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            for model in (Address, Item, Order):
+                editor.delete_model(model)
+
+    def tearDown(self):
+        for model in (Address, Item, Order):
+            model.objects.all().delete()
+
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, Sequence, SequenceNode
+
+        class OrderForm(TreeForm):
+            name = forms.CharField()
+            items = SequenceNode(ItemForm, model=Item)
+            address = Node(AddressForm, model=Address)
+        return Sequence(OrderForm, model=Order)
+
+    def _params(self, n):
+        return [
+            {
+                "name": "order{}".format(i),
+                "items": [{"name": "a", "quantity": "1"}, {"name": "b", "quantity": "2"}],
+                "address": {"city": "city{}".format(i)},
+            }
+            for i in range(n)
+        ]
+
+    def test_it(self):
+        formlike = self._getTarget()(self._params(3))
+        self.assertTrue(formlike.is_valid())
+        with CaptureQueriesContext(connection) as ctx:
+            orders = formlike.save_bulk(batch_size=4)
+        # orders, items (2 batches), addresses
+        self.assertEqual(len(_inserts(ctx.captured_queries)), 4)
+        self.assertEqual([order.name for order in orders], ["order0", "order1", "order2"])
+        self.assertEqual(Item.objects.count(), 6)
+        self.assertEqual(sorted(Item.objects.filter(order=orders[1]).values_list("name", "quantity")),
+                         [("a", 1), ("b", 2)])
+        self.assertEqual(Address.objects.get(order=orders[2]).city, "city2")
+
+    def test_without_returned_pks(self):
+        from unittest import mock
+        formlike = self._getTarget()(self._params(3))
+        self.assertTrue(formlike.is_valid())
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            with CaptureQueriesContext(connection) as ctx:
+                orders = formlike.save_bulk()
+        # orders one by one, items, addresses
+        self.assertEqual(len(_inserts(ctx.captured_queries)), 5)
+        self.assertEqual(sorted(Item.objects.filter(order=orders[1]).values_list("name", "quantity")),
+                         [("a", 1), ("b", 2)])
+        self.assertEqual(Address.objects.get(order=orders[2]).city, "city2")
+
+    def test_tree(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class OrderForm(TreeForm):
+            name = forms.CharField()
+            items = SequenceNode(ItemForm, fast=True, model=Item)
+
+        class ShipmentForm(TreeForm):
+            order = Node(OrderForm, model=Order)
+
+        formlike = ShipmentForm({"order": self._params(1)[0]})
+        self.assertTrue(formlike.is_valid())
+        order, = formlike.save_bulk()
+        self.assertEqual(order.name, "order0")
+        self.assertEqual(list(order.items.order_by("name").values_list("name", flat=True)), ["a", "b"])
+
+    def test_invalid(self):
+        params = self._params(2)
+        params[1]["items"][0]["quantity"] = "x"
+        formlike = self._getTarget()(params)
+        self.assertFalse(formlike.is_valid())
+        with self.assertRaises(ValueError):
+            formlike.save_bulk()
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_rollback(self):
+        from django.db import IntegrityError
+        params = self._params(2)
+        params[1]["items"][0]["quantity"] = "-1"  # valid for the form, not for the database
+        formlike = self._getTarget()(params)
+        self.assertTrue(formlike.is_valid())
+        with self.assertRaises(IntegrityError):
+            formlike.save_bulk()
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_no_fk(self):
+        from django_treeform import TreeForm, Node, Sequence
+
+        class OrderForm(TreeForm):
+            name = forms.CharField()
+            address = Node(AddressForm, model=Order)  # Order has no foreign key to Order
+
+        formlike = Sequence(OrderForm, model=Order)([{"name": "a", "address": {"city": "b"}}])
+        self.assertTrue(formlike.is_valid())
+        with self.assertRaises(ValueError):
+            formlike.save_bulk()
+        self.assertEqual(Order.objects.count(), 0)
@@ -0,0 +1,91 @@
+# -*- coding:utf-8 -*-
+import threading
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class _CustomForm(PointForm):
+    def __init__(self, *args, **kwargs):
+        super(_CustomForm, self).__init__(*args, **kwargs)
+        self.fields["x"].required = False
+
+
+class CheckoutTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class RouteForm(TreeForm):
+            name = forms.CharField()
+            center = Node(PointForm)
+            custom = Node(_CustomForm)
+            points = SequenceNode(PointForm)
+        return RouteForm
+
+    def _params(self, n, x="1"):
+        return {"name": "foo", "center": {"x": x, "y": "2"}, "custom": {"y": "3"}, "points": [{"x": x, "y": "2"}] * n}
+
+    def test_rebound(self):
+        target = self._getTarget()
+        with target.checkout(self._params(3)) as formlike:
+            self.assertTrue(formlike.is_valid())
+            cleaned_data = formlike.cleaned_data
+            center = formlike.nodes[0].form
+            custom = formlike.nodes[1].form
+            point = formlike.nodes[2].form.forms[0]
+
+        for params in [self._params(2, x="a"), self._params(4), {}]:
+            with target.checkout(params) as formlike:
+                expected = target(params)
+                try:
+                    self.assertEqual(formlike.is_valid(), expected.is_valid())
+                except KeyError:
+                    with self.assertRaises(KeyError):
+                        expected.is_valid()
+                    continue
+                self.assertEqual(formlike.errors, expected.errors)
+                self.assertEqual(formlike.cleaned_data, expected.cleaned_data)
+                self.assertIs(formlike.nodes[0].form, center)  # rebound, not rebuilt
+                self.assertIsNot(formlike.nodes[1].form, custom)  # its __init__ may depend on the params
+                self.assertIs(formlike.nodes[2].form.forms[0], point)
+        self.assertEqual(cleaned_data["points"], [{"x": 1, "y": 2}] * 3)  # taken out before, not mutated
+
+    def test_fail_fast(self):
+        target = self._getTarget()
+        with target.checkout(self._params(1)) as formlike:
+            formlike.is_valid()
+            center = formlike.nodes[0].form
+        with target.checkout({"name": ""}, fail_fast=True) as formlike:
+            self.assertFalse(formlike.is_valid())  # the nodes are neither built nor rebound
+        with target.checkout(self._params(1)) as formlike:
+            self.assertTrue(formlike.is_valid())
+            self.assertIs(formlike.nodes[0].form, center)
+
+    def test_maxsize(self):
+        from django_treeform.pool import FormPool
+        pool = FormPool(self._getTarget(), maxsize=1)
+        with pool.checkout(self._params(1)) as outer:
+            with pool.checkout(self._params(1)) as inner:
+                self.assertIsNot(outer, inner)
+        self.assertEqual(len(pool._free()), 1)
+        with pool.checkout(self._params(1)) as formlike:
+            self.assertIs(formlike, inner)
+        self.assertEqual((pool.hits, pool.misses), (1, 2))
+
+    def test_per_thread(self):
+        from django_treeform.pool import FormPool
+        pool = FormPool(self._getTarget())
+        released = []
+
+        def run():
+            with pool.checkout(self._params(1)) as formlike:
+                released.append(formlike)
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        with pool.checkout(self._params(1)) as formlike:
+            self.assertIsNot(formlike, released[0])
@@ -0,0 +1,87 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+class _CountingForm(PointForm):
+    built = []
+
+    def __init__(self, *args, **kwargs):
+        self.built.append(1)
+        super(_CountingForm, self).__init__(*args, **kwargs)
+
+
+class ShapeTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class AreaForm(TreeForm):
+            name = forms.CharField()
+            center = Node(_CountingForm)
+            points = SequenceNode(_CountingForm, max_items=10)
+        return AreaForm
+
+    def _params(self):
+        return {"name": "foo", "center": {"x": "1", "y": "2"}, "points": [{"x": "1", "y": "2"}]}
+
+    def test_json_schema(self):
+        schema = self._getTarget().json_schema()
+        self.assertEqual(schema["title"], "AreaForm")
+        self.assertEqual(schema["required"], ["center", "points"])
+        self.assertFalse(schema["additionalProperties"])
+        self.assertEqual(schema["properties"]["name"], {})
+        self.assertEqual(schema["properties"]["points"]["maxItems"], 10)
+        self.assertEqual(schema["properties"]["points"]["items"]["properties"], {"x": {}, "y": {}})
+
+    def test_check_params(self):
+        target = self._getTarget()
+        self.assertEqual(target.check_params(self._params()), [])
+        params = {"name": "foo", "points": "xy", "junk": 1}
+        self.assertEqual(target.check_params(params), [
+            (("center", ), "This key is required."),
+            (("junk", ), "Unexpected key."),
+            (("points", ), "Expected a list."),
+        ])
+        params = {"center": None, "points": [{"x": "1"}, [], {"z": "1"}]}
+        self.assertEqual(target.check_params(params), [
+            (("center", ), "Expected an object."),
+            (("points", 1), "Expected an object."),
+            (("points", 2, "z"), "Unexpected key."),
+        ])
+        self.assertEqual(len(target.check_params(params, limit=1)), 1)
+        self.assertEqual(target.check_params([]), [((), "Expected an object.")])
+
+    def test_max_items(self):
+        target = self._getTarget()
+        params = self._params()
+        params["points"] = [{"z": "1"}] * 11
+        self.assertEqual(target.check_params(params), [
+            (("points", ), "Ensure this list has at most 10 items (it has 11)."),
+        ])
+
+    def test_rejected_before_building(self):
+        del _CountingForm.built[:]
+        formlike = self._getTarget()({"name": "foo", "center": {"x": "1", "y": "2"}, "points": {}}, check_shape=True)
+        self.assertFalse(formlike.is_valid())
+        self.assertEqual(_CountingForm.built, [])
+        self.assertEqual(formlike.errors, {"__all__": ["points: Expected a list."]})
+        self.assertEqual(formlike.error_store.at(("points", )), ["Expected a list."])
+        self.assertEqual(formlike.n_errors, 1)
+
+        self.assertTrue(self._getTarget()(self._params(), check_shape=True).is_valid())
+
+    def test_declared(self):
+        import asyncio
+
+        class CheckedForm(self._getTarget()):
+            check_shape = True
+
+        formlike = CheckedForm({"name": "foo"})
+        self.assertFalse(asyncio.run(formlike.ais_valid()))
+        self.assertEqual(formlike.shape_errors, [(("center", ), "This key is required."),
+                                                 (("points", ), "This key is required.")])
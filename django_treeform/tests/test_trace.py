@@ -0,0 +1,98 @@
+# -*- coding:utf-8 -*-
+import unittest
+from django import forms
+
+
+class PointForm(forms.Form):
+    x = forms.IntegerField()
+    y = forms.IntegerField()
+
+
+def _clean(node):
+    pass
+
+
+class TracerTests(unittest.TestCase):
+    def _getTarget(self):
+        from django_treeform import Tracer
+        return Tracer
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTarget()(*args, **kwargs)
+
+    def _makeForm(self):
+        from django_treeform import TreeForm, Node, SequenceNode
+
+        class PointListForm(TreeForm):
+            name = forms.CharField()
+            center = Node(PointForm, clean=_clean)
+            points = SequenceNode(PointForm)
+            fast_points = SequenceNode(PointForm, fast=True)
+
+            def clean(self):
+                pass
+        return PointListForm
+
+    def _params(self):
+        point = {"x": "1", "y": "2"}
+        return {"name": "foo", "center": point, "points": [point] * 3, "fast_points": [point] * 2}
+
+    def _counts(self, tracer):
+        return {(".".join(map(str, path)), kind): count for (path, kind), (count, _) in tracer.paths.items()}
+
+    def test_it(self):
+        tracer = self._makeOne()
+        formlike = self._makeForm()(self._params())
+        self.assertTrue(formlike.is_valid(tracer=tracer))
+
+        expected = {
+            ("", "form"): 1,
+            ("", "clean"): 1,
+            ("name", "field"): 1,
+            ("center", "node"): 1,
+            ("center", "clean"): 1,
+            ("points", "node"): 1,
+            ("points.*", "item"): 3,
+            ("fast_points", "node"): 1,
+            ("fast_points.*", "item"): 2,
+        }
+        self.assertEqual(self._counts(tracer), expected)
+        self.assertEqual(tracer.top(1)[0][:2], ((), "form"))
+        self.assertEqual(dict((name, count) for name, count, _ in tracer.class_totals())["PointForm"], 7)
+        self.assertIn("points.*", tracer.report())
+
+    def test_callback(self):
+        records = []
+        tracer = self._makeOne(callback=lambda path, kind, formclass, elapsed: records.append((path, kind)))
+        self._makeForm()(self._params()).is_valid(tracer=tracer)
+        self.assertIn((("points", 2), "item"), records)
+        self.assertIn((("fast_points", 1), "item"), records)
+
+    def test_async(self):
+        import asyncio
+        tracer = self._makeOne()
+        formlike = self._makeForm()(self._params())
+        self.assertTrue(asyncio.run(formlike.ais_valid(tracer=tracer)))
+        counts = self._counts(tracer)
+        self.assertEqual(counts[("center", "node")], 1)
+        self.assertEqual(counts[("points", "node")], 1)
+        self.assertEqual(counts[("name", "field")], 1)
+
+    def test_global(self):
+        from django_treeform import set_tracer, current_tracer
+        tracer = self._makeOne()
+        previous = set_tracer(tracer)
+        try:
+            self._makeForm()(self._params()).is_valid()
+        finally:
+            set_tracer(previous)
+        self.assertIsNone(current_tracer())
+        self.assertEqual(self._counts(tracer)[("points.*", "item")], 3)
+
+    def test_disabled(self):
+        from django_treeform import tracing
+        tracer = self._makeOne()
+        with tracing(tracer):
+            pass
+        self._makeForm()(self._params()).is_valid()
+        self.assertEqual(tracer.paths, {})
@@ -0,0 +1,112 @@
+# -*- coding:utf-8 -*-
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# tracer and key path of the running validation. context variables, so that concurrent
+# subtrees of ais_valid() (asyncio tasks) and threads each see their own path
+_tracer = ContextVar("django_treeform.tracer")
+_path = ContextVar("django_treeform.path", default=())
+_default_tracer = None
+
+
+def current_tracer():
+    """the tracer in use, or None (tracing is disabled)"""
+    return _tracer.get(_default_tracer)
+
+
+def set_tracer(tracer):
+    """set the process wide tracer (None to disable), returns the previous one"""
+    global _default_tracer
+    previous, _default_tracer = _default_tracer, tracer
+    return previous
+
+
+@contextmanager
+def tracing(tracer):
+    """use `tracer` for validations in this block (in this thread or task only)"""
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+def _class_name(formclass):
+    return getattr(formclass, "__name__", None) or type(formclass).__name__
+
+
+def format_path(path):
+    return ".".join(str(k) for k in path) or "(root)"
+
+
+class Tracer(object):
+    """records wall time and call counts of validation by key path.
+
+    kinds are "form" (the root), "node", "item" (a sequence item), "field", "clean" and
+    "batch_clean" (hooks). sequence indexes are aggregated as "*" in `paths`, the exact
+    path is given to callback(path, kind, formclass, elapsed), e.g. for a metrics pipeline.
+    """
+    def __init__(self, callback=None, timer=time.perf_counter):
+        self.callback = callback
+        self.timer = timer
+        self.paths = {}  # (path, kind) -> [count, total]
+        self.classes = {}  # class name -> [count, total]
+
+    def enter(self, key=None):
+        if key is None:
+            return None, self.timer()
+        return _path.set(_path.get() + (key, )), self.timer()
+
+    def leave(self, state, kind, formclass):
+        token, started = state
+        elapsed = self.timer() - started
+        path = _path.get()
+        if token is not None:
+            _path.reset(token)
+        self.record(path, kind, formclass, elapsed)
+
+    def record(self, path, kind, formclass, elapsed):
+        key = (tuple("*" if isinstance(k, int) else k for k in path), kind)
+        stat = self.paths.get(key)
+        if stat is None:
+            stat = self.paths[key] = [0, 0.0]
+        stat[0] += 1
+        stat[1] += elapsed
+        if kind != "field":
+            name = _class_name(formclass)
+            stat = self.classes.get(name)
+            if stat is None:
+                stat = self.classes[name] = [0, 0.0]
+            stat[0] += 1
+            stat[1] += elapsed
+        if self.callback is not None:
+            self.callback(path, kind, formclass, elapsed)
+
+    def top(self, n=10):
+        """[(path, kind, count, total), ...] slowest first. times include the subtrees"""
+        rows = [(path, kind, count, total) for (path, kind), (count, total) in self.paths.items()]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows[:n]
+
+    def class_totals(self):
+        """[(class name, count, total), ...] slowest first"""
+        rows = [(name, count, total) for name, (count, total) in self.classes.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def report(self, n=10):
+        lines = ["{:<40} {:<12} {:>8} {:>12} {:>12}".format("path", "kind", "count", "total(ms)", "mean(ms)")]
+        for path, kind, count, total in self.top(n):
+            lines.append("{:<40} {:<12} {:>8} {:>12.3f} {:>12.3f}".format(
+                format_path(path), kind, count, total * 1000, total * 1000 / count
+            ))
+        lines.append("")
+        lines.append("{:<53} {:>8} {:>12}".format("class", "count", "total(ms)"))
+        for name, count, total in self.class_totals():
+            lines.append("{:<53} {:>8} {:>12.3f}".format(name, count, total * 1000))
+        return "\n".join(lines)
+
+    def clear(self):
+        self.paths.clear()
+        self.classes.clear()
@@ -48,7 +48,10 @@ setup(name='django-treeform',
           },
       tests_require = tests_require,
       test_suite="django_treeform.tests",
-      entry_points = """      """
+      entry_points = """
+      [console_scripts]
+      django-treeform = django_treeform.cli:main
+      """
       )
 
 